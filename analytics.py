@@ -0,0 +1,171 @@
+"""
+Recruiter analytics from precomputed rollups.
+
+Triggers on ``applications`` keep three rollups per job in step with every
+write, the same way counters.py keeps the status counts: applications per day,
+a histogram of match scores in 5-point buckets, and how often each required
+skill was matched. The analytics page reads a few rows per job from these and
+from the status counters, so its cost does not grow with application volume.
+Applications still 'screening' only enter the score and skill rollups once
+they have a score.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from counters import status_counts
+from tasks import SHORTLIST_THRESHOLD
+
+SCORE_BUCKET_WIDTH = 5
+SHORTLIST_THRESHOLDS = (40, 50, 60, 70, 80, 90)
+DAILY_WINDOW_DAYS = 30
+TOP_SKILLS = 15
+
+_SCORE_BUCKET = f"MIN(CAST(COALESCE({{row}}.match_score, 0) / {SCORE_BUCKET_WIDTH} AS INTEGER), {100 // SCORE_BUCKET_WIDTH - 1}) * {SCORE_BUCKET_WIDTH}"
+_SCORED = "{row}.status IS NOT 'screening'"
+
+
+def _daily_bump(row, delta, condition='1'):
+    return f'''
+            INSERT INTO job_daily_applications (job_id, day, count)
+            SELECT {row}.job_id, date({row}.applied_at), {delta} WHERE {condition}
+            ON CONFLICT (job_id, day) DO UPDATE SET count = count + ({delta});'''
+
+
+def _score_bumps(row, delta):
+    scored = _SCORED.format(row=row)
+    return f'''
+            INSERT INTO job_score_histogram (job_id, bucket, count)
+            SELECT {row}.job_id, {_SCORE_BUCKET.format(row=row)}, {delta} WHERE {scored}
+            ON CONFLICT (job_id, bucket) DO UPDATE SET count = count + ({delta});
+            INSERT INTO job_skill_counts (job_id, skill, count)
+            SELECT {row}.job_id, value, {delta}
+            FROM json_each(CASE WHEN json_valid({row}.skills_matched) THEN {row}.skills_matched ELSE '[]' END)
+            WHERE {scored}
+            ON CONFLICT (job_id, skill) DO UPDATE SET count = count + ({delta});'''
+
+
+def create_analytics_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_daily_applications (
+            job_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, day)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_score_histogram (
+            job_id INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, bucket)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_skill_counts (
+            job_id INTEGER NOT NULL,
+            skill TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, skill)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS applications_rollup_insert AFTER INSERT ON applications
+        BEGIN{_daily_bump('NEW', 1)}{_score_bumps('NEW', 1)}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS applications_rollup_delete AFTER DELETE ON applications
+        BEGIN{_daily_bump('OLD', -1)}{_score_bumps('OLD', -1)}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS applications_rollup_update
+        AFTER UPDATE OF status, match_score, skills_matched, job_id ON applications
+        WHEN OLD.status IS NOT NEW.status OR OLD.match_score IS NOT NEW.match_score
+          OR OLD.skills_matched IS NOT NEW.skills_matched OR OLD.job_id != NEW.job_id
+        BEGIN{_daily_bump('OLD', -1, 'OLD.job_id != NEW.job_id')}{_daily_bump('NEW', 1, 'OLD.job_id != NEW.job_id')}{_score_bumps('OLD', -1)}{_score_bumps('NEW', 1)}
+        END
+    ''')
+
+    # Seed the rollups from the applications already on file.
+    cursor.execute('DELETE FROM job_daily_applications')
+    cursor.execute('''
+        INSERT INTO job_daily_applications (job_id, day, count)
+        SELECT job_id, date(applied_at), COUNT(*) FROM applications GROUP BY 1, 2
+    ''')
+    cursor.execute('DELETE FROM job_score_histogram')
+    cursor.execute(f'''
+        INSERT INTO job_score_histogram (job_id, bucket, count)
+        SELECT a.job_id, {_SCORE_BUCKET.format(row='a')}, COUNT(*) FROM applications a
+        WHERE {_SCORED.format(row='a')} GROUP BY 1, 2
+    ''')
+    cursor.execute('DELETE FROM job_skill_counts')
+    cursor.execute(f'''
+        INSERT INTO job_skill_counts (job_id, skill, count)
+        SELECT a.job_id, s.value, COUNT(*)
+        FROM applications a, json_each(CASE WHEN json_valid(a.skills_matched) THEN a.skills_matched ELSE '[]' END) s
+        WHERE {_SCORED.format(row='a')} GROUP BY 1, 2
+    ''')
+
+
+def _scope(recruiter_id, job_id):
+    # Rollup rows for one job, or for every job of the recruiter.
+    if job_id is not None:
+        return 'r.job_id = ?', (job_id,)
+    return 'r.job_id IN (SELECT id FROM jobs WHERE posted_by = ?)', (recruiter_id,)
+
+
+def recruiter_analytics(conn, recruiter_id, job_id=None):
+    """Everything analytics.html shows, for one recruiter or one of their jobs."""
+    where, params = _scope(recruiter_id, job_id)
+    if job_id is not None:
+        counts = status_counts(conn, 'job_status_counts', job_id)
+    else:
+        counts = status_counts(conn, 'recruiter_status_counts', recruiter_id)
+    total = sum(counts.values())
+
+    reached_shortlist = sum(counts.get(s, 0) for s in ('shortlisted', 'interview', 'hired'))
+    funnel = [
+        ('Applied', total),
+        ('Screened', total - counts.get('screening', 0)),
+        ('Shortlisted', reached_shortlist),
+        ('Interview', counts.get('interview', 0) + counts.get('hired', 0)),
+        ('Hired', counts.get('hired', 0)),
+    ]
+
+    # applied_at is stored in UTC (CURRENT_TIMESTAMP), so the days are too.
+    today = datetime.now(timezone.utc).date()
+    days = [(today - timedelta(days=n)).isoformat() for n in range(DAILY_WINDOW_DAYS - 1, -1, -1)]
+    daily = dict(conn.execute(f'''
+        SELECT r.day, SUM(r.count) FROM job_daily_applications r
+        WHERE {where} AND r.day >= ? GROUP BY r.day
+    ''', (*params, days[0])).fetchall())
+
+    histogram = dict(conn.execute(f'''
+        SELECT r.bucket, SUM(r.count) FROM job_score_histogram r WHERE {where} GROUP BY r.bucket
+    ''', params).fetchall())
+    buckets = [(bucket, histogram.get(bucket, 0)) for bucket in range(0, 100, SCORE_BUCKET_WIDTH)]
+    scored = sum(histogram.values())
+    shortlist_rates = []
+    for threshold in SHORTLIST_THRESHOLDS:
+        above = sum(count for bucket, count in buckets if bucket >= threshold)
+        shortlist_rates.append((threshold, above, round(above / scored * 100, 1) if scored else 0.0))
+
+    skills = conn.execute(f'''
+        SELECT r.skill, SUM(r.count) AS count FROM job_skill_counts r WHERE {where}
+        GROUP BY r.skill HAVING SUM(r.count) > 0 ORDER BY count DESC, r.skill LIMIT ?
+    ''', (*params, TOP_SKILLS)).fetchall()
+
+    return {
+        'total_applications': total,
+        'applications_by_status': [{'status': status, 'count': count} for status, count in sorted(counts.items())],
+        'funnel': funnel,
+        'daily_applications': [(day, daily.get(day, 0)) for day in days],
+        'score_histogram': buckets,
+        'scored_applications': scored,
+        'shortlist_rates': shortlist_rates,
+        'shortlist_threshold': SHORTLIST_THRESHOLD,
+        'top_skills': [(row['skill'], row['count']) for row in skills],
+    }
@@ -1,13 +1,32 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file, Response, stream_template, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import sqlite3
 import os
-from datetime import datetime
+import tempfile
+import threading
+from database import connect, get_db, close_db, migrate
 from ml.resume_screening import ResumeScreener
+from ml.extraction import ExtractionLimits
+from tasks import (enqueue_shortlist, task_progress, claim_task, run_task, worker_name, enqueue_screening,
+                   score_application, store_screening)
+from matching import get_job_profile, index_job, index_missing_jobs, match_jobs
+from corpus import load_job_stats
+from counters import status_counts
+from pagination import PAGE_SIZE, decode_cursor, split_page
+from migrations import MIGRATIONS
+from storage import ResumeStore, store_resume, collect_garbage
+from reports import ReportCache, report_etag
+from export import EXPORT_FORMATS, iter_applications, export_csv, export_jsonl, export_zip
+import metrics
+from analytics import recruiter_analytics
+from rescoring import enqueue_rescore, rerank_outgrown_jobs, rescore_all, rescore_job, rescore_queued_jobs
+from skills import has_skills_filter, index_missing_job_skills, job_skill_coverage, matched_skills, store_application_skills
+from search import JOB_TYPES, EXPERIENCE_LEVELS, search_jobs, search_candidates, index_missing_resumes, index_resume
+import io
 import json
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import time
+import click
 
 
 app = Flask(__name__)
@@ -15,89 +34,130 @@ app.secret_key = 'your-secret-key-change-in-production-2024'
 app.config['UPLOAD_FOLDER'] = 'resumes'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'docx', 'txt'}
-
-screener = ResumeScreener()
+app.config['FEATURE_CACHE'] = os.environ.get('FEATURE_CACHE', 'feature_cache.db')
+app.config['FEATURE_CACHE_MAX_BYTES'] = int(os.environ.get('FEATURE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+app.config['SCREENING_WORKERS'] = int(os.environ.get('SCREENING_WORKERS', os.cpu_count() or 1))
+app.config['SCREENING_CHUNK_SIZE'] = int(os.environ.get('SCREENING_CHUNK_SIZE', 25))
+# 'queue' hands bulk shortlisting to worker.py; 'inline' screens within the request.
+app.config['SHORTLIST_MODE'] = os.environ.get('SHORTLIST_MODE', 'queue')
+# 'queue' stores new applications as 'screening' and leaves scoring to
+# worker.py, so submitting only waits on the file write.
+app.config['APPLY_SCREENING'] = os.environ.get('APPLY_SCREENING', 'inline')
+# Run worker.py's loop on a thread of every web process, so queued work is
+# done without a separate worker; set to 0 when worker.py runs on its own.
+app.config['BACKGROUND_WORKER'] = os.environ.get('BACKGROUND_WORKER', '1') == '1'
+# Where re-scoring after a job edit runs; same choices as SHORTLIST_MODE.
+app.config['RESCORE_MODE'] = os.environ.get('RESCORE_MODE', app.config['SHORTLIST_MODE'])
+app.config['JOB_MATCHER_LIMIT'] = 10
+app.config['PAGE_SIZE'] = int(os.environ.get('PAGE_SIZE', PAGE_SIZE))
+app.config['SEARCH_PAGE_SIZE'] = int(os.environ.get('SEARCH_PAGE_SIZE', 20))
+# Stream list pages to the client as they render (also per request with ?stream=1).
+app.config['STREAM_TEMPLATES'] = os.environ.get('STREAM_TEMPLATES') == '1'
+app.config['REPORT_CACHE_MAX_BYTES'] = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+# Stage/route timings at /metrics; set METRICS_DIR to aggregate gunicorn workers.
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED') == '1'
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR')
+# Parse PDF/DOCX uploads in a child process with a wall-clock and memory cap.
+app.config['EXTRACTION_SANDBOX'] = os.environ.get('EXTRACTION_SANDBOX', '1') == '1'
+app.config['EXTRACTION_MAX_PAGES'] = int(os.environ.get('EXTRACTION_MAX_PAGES', 30))
+app.config['EXTRACTION_MAX_CHARS'] = int(os.environ.get('EXTRACTION_MAX_CHARS', 100_000))
+app.config['EXTRACTION_TIMEOUT'] = float(os.environ.get('EXTRACTION_TIMEOUT', 10))
+app.config['EXTRACTION_MEMORY_MB'] = int(os.environ.get('EXTRACTION_MEMORY_MB', 512))
+
+# Built by startup(), so importing the app stays cheap and touches nothing
+# on disk.
+screener = None
+resume_store = ResumeStore(app.config['UPLOAD_FOLDER'])
+report_cache = None
+
+# The request hooks have to be registered before the first request; the
+# registry only writes to METRICS_DIR once it flushes.
+registry = metrics.Registry(app.config['METRICS_DIR']) if app.config['METRICS_ENABLED'] else None
+if registry is not None:
+    metrics.init_app(app, registry)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-def get_db():
-    conn = sqlite3.connect('database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+app.teardown_appcontext(close_db)
+
+def render_page(template, **context):
+    if app.config['STREAM_TEMPLATES'] or request.args.get('stream') == '1':
+        return Response(stream_template(template, **context))
+    return render_template(template, **context)
 
 def init_db():
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL,
-            full_name TEXT,
-            phone TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        ) 
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT NOT NULL,
-            requirements TEXT NOT NULL,
-            location TEXT,
-            job_type TEXT,
-            experience_level TEXT,
-            salary_range TEXT,
-            posted_by INTEGER,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (posted_by) REFERENCES users (id)
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS applications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            job_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            resume_path TEXT NOT NULL,
-            cover_letter TEXT,
-            match_score REAL,
-            skills_matched TEXT,
-            experience_years INTEGER,
-            education_level TEXT,
-            status TEXT DEFAULT 'pending',
-            screening_result TEXT,
-            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (job_id) REFERENCES jobs (id),
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    try:
-        cursor.execute(
-            "INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)",
-            ('recruiter1', 'recruiter@company.com', generate_password_hash('recruiter123'), 'recruiter', 'Demo Recruiter')
-        )
-        cursor.execute(
-            "INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)",
-            ('jobseeker1', 'jobseeker@email.com', generate_password_hash('jobseeker123'), 'jobseeker', 'Demo Job Seeker')
-        )
-    except sqlite3.IntegrityError:
-        pass
-    
-    conn.commit()
+    """Bring the database schema up to date; a no-op when it already is."""
+    conn = connect()
+    applied = migrate(conn, MIGRATIONS)
+    if applied:
+        print(f"Applied migrations: {', '.join(applied)}")
+        index_missing_jobs(conn, screener)
+        index_missing_job_skills(conn, screener)
+        conn.commit()
+    conn.close()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Apply pending schema migrations."""
+    startup()
+
+@app.cli.command('gc-resumes')
+def gc_resumes_command():
+    """Delete stored resumes that no application refers to."""
+    startup()
+    conn = connect()
+    print(f"Removed {collect_garbage(conn)} unreferenced resume(s)")
+    conn.close()
+
+@app.cli.command('index-resumes')
+def index_resumes_command():
+    """Add screened applications missing from the candidate search index."""
+    startup()
+    conn = connect()
+    print(f"Indexed {index_missing_resumes(conn, screener)} resume(s)")
+    conn.close()
+
+@app.cli.command('rescore')
+@click.option('--job', 'job_ids', type=int, multiple=True, help="Job to re-score (repeatable).")
+def rescore_command(job_ids):
+    """Recompute stale match scores from already extracted resume text."""
+    startup()
+    conn = connect()
+    started = time.perf_counter()
+    count = rescore_all(conn, screener, list(job_ids) or None)
+    print(f"Re-scored {count} application(s) in {time.perf_counter() - started:.1f}s "
+          f"(scoring version {screener.scoring_version})")
     conn.close()
 
 @app.route('/')
 def index():
     return render_template('landing.html')
 
+@app.route('/jobs')
+def public_jobs():
+    filters = {
+        'q': request.args.get('q', '').strip(),
+        'location': request.args.get('location', '').strip(),
+        'job_type': request.args.get('job_type', '') if request.args.get('job_type') in JOB_TYPES else '',
+        'experience_level': (request.args.get('experience_level', '')
+                             if request.args.get('experience_level') in EXPERIENCE_LEVELS else ''),
+    }
+    after = decode_cursor(request.args.get('after'), 2)
+    
+    conn = get_db()
+    jobs, next_cursor = search_jobs(conn, filters['q'], filters['location'], filters['job_type'],
+                                    filters['experience_level'], after=after,
+                                    page_size=app.config['SEARCH_PAGE_SIZE'])
+    return render_page('public_jobs.html', jobs=jobs, next_cursor=next_cursor, filters=filters,
+                       paged=after is not None, job_types=JOB_TYPES, experience_levels=EXPERIENCE_LEVELS)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if registry is None:
+        return 'Metrics are disabled', 404
+    return Response(registry.collect(), mimetype='text/plain; version=0.0.4')
+
 # ==================== AUTHENTICATION ====================
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -109,7 +169,6 @@ def login():
         
         conn = get_db()
         user = conn.execute('SELECT * FROM users WHERE username = ? AND role = ?', (username, role)).fetchone()
-        conn.close()
         
         if user and check_password_hash(user['password'], password):
             session['user_id'] = user['id']
@@ -148,8 +207,6 @@ def register():
             return redirect(url_for('login'))
         except sqlite3.IntegrityError:
             flash('Username or email already exists', 'error')
-        finally:
-            conn.close()
     
     return render_template('register.html')
 
@@ -161,6 +218,14 @@ def logout():
 
 # ==================== RECRUITER ROUTES ====================
 
+@app.route('/dashboard')
+def dashboard():
+    if session.get('role') == 'recruiter':
+        return redirect(url_for('recruiter_dashboard'))
+    if session.get('role') == 'jobseeker':
+        return redirect(url_for('jobseeker_dashboard'))
+    return redirect(url_for('login'))
+
 @app.route('/recruiter/dashboard')
 def recruiter_dashboard():
     if 'user_id' not in session or session.get('role') != 'recruiter':
@@ -169,22 +234,10 @@ def recruiter_dashboard():
     
     conn = get_db()
     
-    my_jobs = conn.execute('SELECT COUNT(*) as count FROM jobs WHERE posted_by = ?', (session['user_id'],)).fetchone()['count']
-    total_applications = conn.execute('''
-        SELECT COUNT(*) as count FROM applications a
-        JOIN jobs j ON a.job_id = j.id WHERE j.posted_by = ?
-    ''', (session['user_id'],)).fetchone()['count']
-    pending = conn.execute('''
-        SELECT COUNT(*) as count FROM applications a
-        JOIN jobs j ON a.job_id = j.id WHERE j.posted_by = ? AND a.status = "pending"
-    ''', (session['user_id'],)).fetchone()['count']
-    shortlisted = conn.execute('''
-        SELECT COUNT(*) as count FROM applications a
-        JOIN jobs j ON a.job_id = j.id WHERE j.posted_by = ? AND a.status = "shortlisted"
-    ''', (session['user_id'],)).fetchone()['count']
+    counts = status_counts(conn, 'recruiter_status_counts', session['user_id'])
     
     jobs = conn.execute('''
-        SELECT j.*, (SELECT COUNT(*) FROM applications WHERE job_id = j.id) as application_count
+        SELECT j.*, COALESCE((SELECT SUM(count) FROM job_status_counts WHERE job_id = j.id), 0) as application_count
         FROM jobs j WHERE j.posted_by = ? ORDER BY j.created_at DESC
     ''', (session['user_id'],)).fetchall()
     
@@ -197,13 +250,48 @@ def recruiter_dashboard():
         ORDER BY a.applied_at DESC LIMIT 5
     ''', (session['user_id'],)).fetchall()
     
-    conn.close()
-    
-    stats = {'total_jobs': my_jobs, 'total_applications': total_applications, 
-             'pending_applications': pending, 'shortlisted': shortlisted}
+    stats = {'total_jobs': len(jobs), 'total_applications': sum(counts.values()), 
+             'pending_applications': counts.get('pending', 0), 'shortlisted': counts.get('shortlisted', 0)}
     
     return render_template('recruiter_dashboard.html', stats=stats, jobs=jobs, applications=recent_apps)
 
+@app.route('/recruiter/analytics')
+def analytics():
+    if 'user_id' not in session or session.get('role') != 'recruiter':
+        flash('Access denied. Recruiters only.', 'error')
+        return redirect(url_for('login'))
+    
+    conn = get_db()
+    jobs = conn.execute('SELECT id, title FROM jobs WHERE posted_by = ? ORDER BY created_at DESC, id DESC',
+                        (session['user_id'],)).fetchall()
+    job_id = request.args.get('job_id', type=int)
+    if job_id is not None and job_id not in {job['id'] for job in jobs}:
+        flash('Job not found', 'error')
+        return redirect(url_for('analytics'))
+    
+    data = recruiter_analytics(conn, session['user_id'], job_id)
+    return render_template('analytics.html', jobs=jobs, selected_job=job_id, **data)
+
+@app.route('/recruiter/candidates')
+def candidate_search():
+    if 'user_id' not in session or session.get('role') != 'recruiter':
+        flash('Access denied. Recruiters only.', 'error')
+        return redirect(url_for('login'))
+    
+    conn = get_db()
+    jobs = conn.execute('SELECT id, title FROM jobs WHERE posted_by = ? ORDER BY created_at DESC, id DESC',
+                        (session['user_id'],)).fetchall()
+    query = request.args.get('q', '').strip()
+    job_id = request.args.get('job_id', type=int)
+    if job_id not in {job['id'] for job in jobs}:
+        job_id = None
+    after = decode_cursor(request.args.get('after'), 2)
+    
+    candidates, next_cursor = search_candidates(conn, session['user_id'], query, job_id, after=after,
+                                                page_size=app.config['SEARCH_PAGE_SIZE'])
+    return render_page('candidate_search.html', jobs=jobs, query=query, selected_job=job_id,
+                       candidates=candidates, next_cursor=next_cursor, paged=after is not None)
+
 @app.route('/recruiter/jobs/create', methods=['GET', 'POST'])
 def create_job():
     if 'user_id' not in session or session.get('role') != 'recruiter':
@@ -211,7 +299,7 @@ def create_job():
     
     if request.method == 'POST':
         conn = get_db()
-        conn.execute('''
+        cursor = conn.execute('''
             INSERT INTO jobs (title, description, requirements, location, job_type, 
                             experience_level, salary_range, posted_by)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
@@ -219,13 +307,52 @@ def create_job():
               request.form.get('requirements'), request.form.get('location'),
               request.form.get('job_type'), request.form.get('experience_level'),
               request.form.get('salary_range'), session['user_id']))
+        index_job(conn, screener, cursor.lastrowid, request.form.get('title') or '',
+                  request.form.get('description') or '', request.form.get('requirements') or '')
         conn.commit()
-        conn.close()
         flash('Job posted successfully!', 'success')
         return redirect(url_for('recruiter_dashboard'))
     
     return render_template('create_job.html')
 
+@app.route('/recruiter/jobs/<int:job_id>/edit', methods=['GET', 'POST'])
+def edit_job(job_id):
+    if 'user_id' not in session or session.get('role') != 'recruiter':
+        return redirect(url_for('login'))
+    
+    conn = get_db()
+    job = conn.execute('SELECT * FROM jobs WHERE id = ? AND posted_by = ?',
+                       (job_id, session['user_id'])).fetchone()
+    if not job:
+        flash('Job not found', 'error')
+        return redirect(url_for('recruiter_dashboard'))
+    
+    if request.method == 'POST':
+        title = request.form.get('title') or ''
+        requirements = request.form.get('requirements') or ''
+        conn.execute('''
+            UPDATE jobs SET title = ?, description = ?, requirements = ?, location = ?, job_type = ?,
+                            experience_level = ?, salary_range = ?
+            WHERE id = ?
+        ''', (title, request.form.get('description'), requirements, request.form.get('location'),
+              request.form.get('job_type'), request.form.get('experience_level'),
+              request.form.get('salary_range'), job_id))
+        index_job(conn, screener, job_id, title, request.form.get('description') or '', requirements)
+        conn.commit()
+        
+        if (title, requirements) == (job['title'], job['requirements']):
+            flash('Job updated.', 'success')
+        elif app.config['RESCORE_MODE'] == 'inline':
+            count = rescore_job(conn, screener, job_id)
+            flash(f'Job updated. Re-scored {count} application(s) against the new requirements.', 'success')
+        else:
+            enqueue_rescore(conn, job_id)
+            conn.commit()
+            flash('Job updated. Applications are being re-scored against the new requirements.', 'success')
+        return redirect(url_for('recruiter_dashboard'))
+    
+    return render_template('create_job.html', job=job)
+
 @app.route('/recruiter/jobs/<int:job_id>/applications')
 def view_applications(job_id):
     if 'user_id' not in session or session.get('role') != 'recruiter':
@@ -237,19 +364,59 @@ def view_applications(job_id):
     
     if not job:
         flash('Job not found', 'error')
-        conn.close()
         return redirect(url_for('recruiter_dashboard'))
     
-    applications = conn.execute('''
+    if app.config['RESCORE_MODE'] == 'inline':
+        # Re-rankings queued by apply_job run here, before the ranking is shown.
+        rescore_queued_jobs(conn, screener, [job_id])
+
+    page_size = app.config['PAGE_SIZE']
+    after = decode_cursor(request.args.get('after'), 3)
+    keyset = 'AND (a.match_score, a.applied_at, a.id) < (?, ?, ?)' if after else ''
+    skills = [skill for skill in request.args.get('skills', '').split(',') if skill.strip()]
+    skill_filter, skill_params = has_skills_filter(skills)
+    rows = conn.execute(f'''
         SELECT a.*, u.full_name as candidate_name, u.email as candidate_email, u.phone as candidate_phone
         FROM applications a
         JOIN users u ON a.user_id = u.id
-        WHERE a.job_id = ?
-        ORDER BY a.match_score DESC, a.applied_at DESC
-    ''', (job_id,)).fetchall()
-    conn.close()
+        WHERE a.job_id = ? AND {skill_filter} {keyset}
+        ORDER BY a.match_score DESC, a.applied_at DESC, a.id DESC
+        LIMIT ?
+    ''', (job_id, *skill_params, *(after or ()), page_size + 1)).fetchall()
+    applications, next_cursor = split_page(rows, page_size,
+                                           lambda a: (a['match_score'], a['applied_at'], a['id']))
+    total = sum(status_counts(conn, 'job_status_counts', job_id).values())
+    skills_by_app = matched_skills(conn, [a['id'] for a in applications])
+    
+    return render_page('recruiter_applications.html', job=job, applications=applications,
+                       skills_by_app=skills_by_app, coverage=job_skill_coverage(conn, job_id),
+                       skill_filter=skills, total=total, next_cursor=next_cursor, paged=after is not None)
+
+@app.route('/recruiter/jobs/<int:job_id>/export')
+def export_applications(job_id):
+    if 'user_id' not in session or session.get('role') != 'recruiter':
+        return redirect(url_for('login'))
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unknown format '{fmt}'", 'formats': sorted(EXPORT_FORMATS)}), 400
+    
+    conn = get_db()
+    job = conn.execute('SELECT id FROM jobs WHERE id = ? AND posted_by = ?',
+                       (job_id, session['user_id'])).fetchone()
+    if not job:
+        flash('Job not found', 'error')
+        return redirect(url_for('recruiter_dashboard'))
     
-    return render_template('recruiter_applications.html', job=job, applications=applications)
+    rows = iter_applications(conn, job_id)
+    if fmt == 'csv':
+        body = export_csv(rows)
+    elif fmt == 'jsonl':
+        body = export_jsonl(rows)
+    else:
+        body = export_zip(rows, report_cache)
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename=job_{job_id}_applications.{fmt}'})
 
 @app.route('/recruiter/applications/<int:app_id>/update', methods=['POST'])
 def update_status(app_id):
@@ -263,13 +430,11 @@ def update_status(app_id):
     ''', (app_id,)).fetchone()
     
     if not app or app['posted_by'] != session['user_id']:
-        conn.close()
         return jsonify({'error': 'Unauthorized'}), 401
     
     conn.execute('UPDATE applications SET status = ? WHERE id = ?', 
                  (request.json.get('status'), app_id))
     conn.commit()
-    conn.close()
     return jsonify({'success': True})
 
 @app.route('/recruiter/applications/<int:app_id>/ai-shortlist', methods=['POST'])
@@ -284,16 +449,25 @@ def ai_shortlist(app_id):
     ''', (app_id,)).fetchone()
     
     if not app or app['posted_by'] != session['user_id']:
-        conn.close()
         return jsonify({'error': 'Unauthorized'}), 401
     
-    result = screener.screen_resume(app['resume_path'], app['requirements'], app['title'])
+    profile = get_job_profile(conn, screener, {'id': app['job_id'], 'title': app['title'],
+                                               'requirements': app['requirements']})
+    stats = load_job_stats(conn, app['job_id'])
+    features = screener.extract_features(app['resume_path'])
+    result = screener.screen_features(features, profile, stats=stats)
     status = 'shortlisted' if result['match_score'] >= 60 else 'rejected'
     
-    conn.execute('UPDATE applications SET status = ?, screening_result = ? WHERE id = ?',
-                 (status, json.dumps(result), app_id))
+    if features:
+        index_resume(conn, app_id, features)
+    store_application_skills(conn, app_id, result)
+    conn.execute('''
+        UPDATE applications SET status = ?, match_score = ?, screening_result = ?,
+                                scoring_version = ?, profile_fingerprint = ?
+        WHERE id = ?
+    ''', (status, result['match_score'], json.dumps(result), result.get('scoring_version'),
+          result.get('profile_fingerprint'), app_id))
     conn.commit()
-    conn.close()
     
     return jsonify({'success': True, 'status': status, 'match_score': result['match_score']})
 
@@ -310,33 +484,36 @@ def ai_shortlist_all(job_id):
     ).fetchone()
 
     if not job:
-        conn.close()
         return jsonify({'error': 'Job not found'}), 404
 
-    applications = conn.execute(
-        'SELECT * FROM applications WHERE job_id = ? AND status = "pending"',
-        (job_id,)
-    ).fetchall()
-
-    updated = 0
-    for app in applications:
-        result = screener.screen_resume(
-            app['resume_path'],
-            job['requirements'],
-            job['title']
-        )
-        status = 'shortlisted' if result['match_score'] >= 60 else 'rejected'
-
-        conn.execute(
-            'UPDATE applications SET status = ?, screening_result = ? WHERE id = ?',
-            (status, json.dumps(result), app['id'])
-        )
-        updated += 1
+    task_id = enqueue_shortlist(conn, job_id, session['user_id'])
+    worker = worker_name()
+    # Claimed like a worker would, so the task shows as running meanwhile.
+    if app.config['SHORTLIST_MODE'] == 'inline' and claim_task(conn, worker, task_id=task_id):
+        run_task(conn, task_id, screener, worker,
+                 max_workers=app.config['SCREENING_WORKERS'],
+                 chunk_size=app.config['SCREENING_CHUNK_SIZE'])
+    progress = task_progress(conn, task_id)
+
+    return jsonify({'success': True, 'task_id': task_id, 'status': progress['status'],
+                    'total': progress['total'], 'processed': progress['processed'],
+                    'progress_url': url_for('shortlist_progress', task_id=task_id)}), 202
+
+@app.route('/recruiter/shortlist-tasks/<int:task_id>')
+def shortlist_progress(task_id):
+    if 'user_id' not in session or session.get('role') != 'recruiter':
+        return jsonify({'error': 'Unauthorized'}), 401
 
-    conn.commit()
-    conn.close()
+    conn = get_db()
+    task = conn.execute('''
+        SELECT t.id FROM shortlist_tasks t
+        JOIN jobs j ON t.job_id = j.id WHERE t.id = ? AND j.posted_by = ?
+    ''', (task_id, session['user_id'])).fetchone()
+    if not task:
+        return jsonify({'error': 'Task not found'}), 404
 
-    return jsonify({'success': True, 'processed': updated})
+    progress = task_progress(conn, task_id)
+    return jsonify(progress)
 
 @app.route('/recruiter/applications/<int:app_id>/download-report')
 def download_ai_report(app_id):
@@ -348,23 +525,27 @@ def download_ai_report(app_id):
         'SELECT a.screening_result, j.posted_by FROM applications a JOIN jobs j ON a.job_id=j.id WHERE a.id=?',
         (app_id,)
     ).fetchone()
-    conn.close()
 
     if not app or app['posted_by'] != session['user_id']:
         return redirect(url_for('recruiter_dashboard'))
 
-    result = json.loads(app['screening_result'])
-
-    file_path = f"ai_report_{app_id}.pdf"
-    c = canvas.Canvas(file_path, pagesize=letter)
-    c.drawString(50, 750, f"Match Score: {result['match_score']}%")
-    c.drawString(50, 720, f"Recommendation: {result['recommendation']}")
-    c.drawString(50, 690, f"Experience: {result['experience_years']} years")
-    c.drawString(50, 660, f"Education: {result['education_level']}")
-    c.drawString(50, 630, f"Skills Matched: {', '.join(result['skills_matched'])}")
-    c.save()
+    if not app['screening_result']:
+        flash('This application has not been screened yet', 'warning')
+        return redirect(url_for('recruiter_dashboard'))
 
-    return send_file(file_path, as_attachment=True)
+    # The ETag is derived from the stored result alone, so a revalidation is
+    # answered before any PDF work happens.
+    etag = report_etag(app['screening_result'])
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        pdf = report_cache.report(app['screening_result'])
+        response = send_file(io.BytesIO(pdf), mimetype='application/pdf', as_attachment=True,
+                             download_name=f"ai_report_{app_id}.pdf", etag=False)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 
 
@@ -378,27 +559,32 @@ def jobseeker_dashboard():
     
     conn = get_db()
     
-    my_apps = conn.execute('SELECT COUNT(*) as count FROM applications WHERE user_id = ?', 
-                          (session['user_id'],)).fetchone()['count']
-    pending = conn.execute('SELECT COUNT(*) as count FROM applications WHERE user_id = ? AND status = "pending"',
-                          (session['user_id'],)).fetchone()['count']
-    shortlisted = conn.execute('SELECT COUNT(*) as count FROM applications WHERE user_id = ? AND status = "shortlisted"',
-                              (session['user_id'],)).fetchone()['count']
+    counts = status_counts(conn, 'seeker_status_counts', session['user_id'])
     
-    jobs = conn.execute('SELECT * FROM jobs WHERE status = "active" ORDER BY created_at DESC').fetchall()
+    page_size = app.config['PAGE_SIZE']
+    jobs_after = decode_cursor(request.args.get('jobs_after'), 2)
+    keyset = 'AND (created_at, id) < (?, ?)' if jobs_after else ''
+    rows = conn.execute(f'''
+        SELECT * FROM jobs WHERE status = "active" {keyset}
+        ORDER BY created_at DESC, id DESC LIMIT ?
+    ''', (*(jobs_after or ()), page_size + 1)).fetchall()
+    jobs, next_jobs = split_page(rows, page_size, lambda j: (j['created_at'], j['id']))
     
-    my_applications = conn.execute('''
+    apps_after = decode_cursor(request.args.get('apps_after'), 2)
+    keyset = 'AND (a.applied_at, a.id) < (?, ?)' if apps_after else ''
+    rows = conn.execute(f'''
         SELECT a.*, j.title as job_title, j.location, j.job_type
         FROM applications a
         JOIN jobs j ON a.job_id = j.id
-        WHERE a.user_id = ?
-        ORDER BY a.applied_at DESC
-    ''', (session['user_id'],)).fetchall()
-    
-    conn.close()
+        WHERE a.user_id = ? {keyset}
+        ORDER BY a.applied_at DESC, a.id DESC LIMIT ?
+    ''', (session['user_id'], *(apps_after or ()), page_size + 1)).fetchall()
+    my_applications, next_apps = split_page(rows, page_size, lambda a: (a['applied_at'], a['id']))
     
-    stats = {'total_applications': my_apps, 'pending': pending, 'shortlisted': shortlisted}
-    return render_template('jobseeker_dashboard.html', stats=stats, jobs=jobs, applications=my_applications)
+    stats = {'total_applications': sum(counts.values()), 'pending': counts.get('pending', 0),
+             'shortlisted': counts.get('shortlisted', 0)}
+    return render_page('jobseeker_dashboard.html', stats=stats, jobs=jobs, applications=my_applications,
+                       next_jobs=next_jobs, next_apps=next_apps)
 
 @app.route('/jobseeker/jobs/<int:job_id>/apply', methods=['GET', 'POST'])
 def apply_job(job_id):
@@ -414,36 +600,75 @@ def apply_job(job_id):
     
     if existing:
         flash('You have already applied for this job', 'warning')
-        conn.close()
         return redirect(url_for('jobseeker_dashboard'))
     
     if request.method == 'POST':
         file = request.files['resume']
         if file and allowed_file(file.filename):
-            filename = secure_filename(f"{session['username']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+            filepath = store_resume(conn, resume_store, file)
             
-            result = screener.screen_resume(filepath, job['requirements'], job['title'])
+            queued = app.config['APPLY_SCREENING'] == 'queue'
+            result, features = (None, None) if queued else score_application(conn, screener, job, filepath)
+            try:
+                cursor = conn.execute('''
+                    INSERT INTO applications (job_id, user_id, resume_path, resume_name, cover_letter,
+                                            match_score, status)
+                    VALUES (?, ?, ?, ?, ?, 0, ?)
+                ''', (job_id, session['user_id'], filepath, secure_filename(file.filename),
+                      request.form.get('cover_letter'), 'screening' if queued else 'pending'))
+            except sqlite3.IntegrityError:
+                # A concurrent submit won the UNIQUE(job_id, user_id) race.
+                conn.rollback()
+                flash('You have already applied for this job', 'warning')
+                return redirect(url_for('jobseeker_dashboard'))
             
-            conn.execute('''
-                INSERT INTO applications (job_id, user_id, resume_path, cover_letter,
-                                        match_score, skills_matched, experience_years,
-                                        education_level, screening_result)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (job_id, session['user_id'], filepath, request.form.get('cover_letter'),
-                  result['match_score'], json.dumps(result['skills_matched']),
-                  result.get('experience_years', 0), result.get('education_level', 'Unknown'),
-                  json.dumps(result)))
+            if queued:
+                enqueue_screening(conn, cursor.lastrowid)
+            else:
+                store_screening(conn, cursor.lastrowid, result, features)
             conn.commit()
-            conn.close()
-            flash(f'Application submitted! Your match score: {result["match_score"]}%', 'success')
+            if not queued:
+                # Re-ranking costs time in the job's applicant count, so a
+                # submit only queues it; see view_applications.
+                rerank_outgrown_jobs(conn, [job_id])
+                conn.commit()
+            if queued:
+                flash('Application submitted! Your match score will appear on your dashboard shortly.', 'success')
+            else:
+                flash(f'Application submitted! Your match score: {result["match_score"]}%', 'success')
             return redirect(url_for('jobseeker_dashboard'))
     
-    conn.close()
     return render_template('apply_job.html', job=job)
 
 
+@app.route('/jobseeker/job-matcher', methods=['GET', 'POST'])
+def job_matcher():
+    if 'user_id' not in session or session.get('role') != 'jobseeker':
+        return redirect(url_for('login'))
+    
+    matches = None
+    if request.method == 'POST':
+        file = request.files.get('resume')
+        if file and allowed_file(file.filename):
+            suffix = '.' + file.filename.rsplit('.', 1)[1].lower()
+            # The resume is parsed once here and scored against every job's
+            # precomputed vector; nothing is kept on disk afterwards.
+            with tempfile.NamedTemporaryFile(suffix=suffix, dir=app.config['UPLOAD_FOLDER']) as tmp:
+                file.save(tmp)
+                tmp.flush()
+                features = screener.extract_features(tmp.name)
+            
+            if features:
+                conn = get_db()
+                matches = match_jobs(conn, features, limit=app.config['JOB_MATCHER_LIMIT'])
+            else:
+                flash('Could not read text from your resume', 'error')
+        else:
+            flash('Please upload a PDF, DOCX or TXT resume', 'error')
+    
+    return render_template('job_matcher.html', matches=matches)
+
+
 @app.route('/download-resume/<int:app_id>')
 def download_resume(app_id):
     if 'user_id' not in session or session.get('role') != 'recruiter':
@@ -451,17 +676,73 @@ def download_resume(app_id):
     
     conn = get_db()
     app = conn.execute('''
-        SELECT a.resume_path, j.posted_by FROM applications a
+        SELECT a.resume_path, a.resume_name, j.posted_by FROM applications a
         JOIN jobs j ON a.job_id = j.id WHERE a.id = ?
     ''', (app_id,)).fetchone()
-    conn.close()
     
     if not app or app['posted_by'] != session['user_id']:
         flash('Unauthorized', 'error')
         return redirect(url_for('recruiter_dashboard'))
     
-    return send_file(app['resume_path'], as_attachment=True)
-
-os.makedirs('resumes', exist_ok=True)
-init_db()
-
+    # Stored paths are relative to the working directory, not the app root.
+    return send_file(os.path.abspath(app['resume_path']), as_attachment=True,
+                     download_name=app['resume_name'] or os.path.basename(app['resume_path']))
+
+# ==================== STARTUP ====================
+
+_startup_lock = threading.Lock()
+_started = False
+
+def startup():
+    """Build the screener, create the upload folder and migrate the schema, once per process.
+
+    wsgi.py calls this at import, so under gunicorn --preload it runs in the
+    master before any worker forks, and the workers share the screener's
+    read-only tables copy-on-write. Any other entry point gets it on the
+    first request instead.
+    """
+    global screener, report_cache, _started
+    with _startup_lock:
+        if _started:
+            return
+        screener = ResumeScreener(cache_path=app.config['FEATURE_CACHE'],
+                                  cache_max_bytes=app.config['FEATURE_CACHE_MAX_BYTES'],
+                                  extraction_limits=ExtractionLimits(max_pages=app.config['EXTRACTION_MAX_PAGES'],
+                                                                     max_chars=app.config['EXTRACTION_MAX_CHARS'],
+                                                                     timeout=app.config['EXTRACTION_TIMEOUT'],
+                                                                     memory_mb=app.config['EXTRACTION_MEMORY_MB']),
+                                  sandbox=app.config['EXTRACTION_SANDBOX'])
+        if registry is not None:
+            metrics.instrument_screener(screener, registry)
+        report_cache = ReportCache(app.config['REPORT_CACHE_MAX_BYTES'])
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        init_db()
+        _started = True
+
+_background_pid = None
+
+def start_background_worker():
+    """Start the in-process worker thread (BACKGROUND_WORKER), once per process.
+
+    Threads do not survive a fork, so each gunicorn worker starts its own.
+    """
+    global _background_pid
+    if not app.config['BACKGROUND_WORKER']:
+        return
+    with _startup_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+    from worker import start_in_background
+    start_in_background()
+
+@app.before_request
+def ensure_started():
+    if not _started:
+        startup()
+    if app.config['BACKGROUND_WORKER'] and _background_pid != os.getpid():
+        start_background_worker()
+
+if __name__ == '__main__':
+    startup()
+    app.run(debug=True)
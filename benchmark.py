@@ -0,0 +1,147 @@
+"""
+Screening benchmark.
+
+    python benchmark.py --count 300                     # generate a corpus if needed, then measure
+    python benchmark.py --save baseline.json            # record the numbers
+    python benchmark.py --baseline baseline.json        # fail (exit 1) on a p95 regression
+
+Every ResumeScreener stage is timed separately on each resume of a synthetic
+corpus from create_test_data.generate_corpus, followed by whole screen_resume
+calls. Reports throughput and p50/p95/p99 latency per stage (and per file
+format for text extraction). The feature cache is off unless --cache is
+given, so screen_resume always measures a full parse.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from create_test_data import generate_corpus
+from ml.extraction import ExtractionLimits
+from ml.resume_screening import ResumeScreener
+
+JOB_TITLE = "Senior Python Developer"
+JOB_REQUIREMENTS = ("5+ years of Python development experience. Strong expertise in Django and Flask. "
+                    "REST API development, SQL and PostgreSQL, Git, Docker and AWS. "
+                    "Bachelor's degree in Computer Science. Agile methodologies. Machine learning is a plus.")
+STAGES = ['extract_text', 'extract_skills', 'scan_fields',
+          'calculate_match_score', 'screen_resume']
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+def summarize(samples):
+    values = sorted(samples)
+    total = sum(values)
+    return {
+        'count': len(values),
+        'throughput_per_s': round(len(values) / total, 1) if total else 0.0,
+        'mean_ms': round(total / len(values) * 1000, 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+    }
+
+
+def load_corpus(corpus_dir, count, seed):
+    manifest_path = os.path.join(corpus_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest['seed'] == seed and len(manifest['resumes']) >= count:
+            return manifest['resumes'][:count]
+    print(f"Generating {count} resumes in {corpus_dir}/ ...", file=sys.stderr)
+    return generate_corpus(count, corpus_dir, seed=seed)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(screener, resumes, repeat=1):
+    samples = {stage: [] for stage in STAGES}
+    by_format = {}
+    profile = screener.job_profile(JOB_REQUIREMENTS, JOB_TITLE)
+
+    # One untimed pass so imports, regex compilation and page cache are warm.
+    for item in resumes[:5]:
+        screener.screen_resume(item['path'], profile)
+
+    for _ in range(repeat):
+        for item in resumes:
+            text, elapsed = timed(screener.extract_text, item['path'])
+            samples['extract_text'].append(elapsed)
+            by_format.setdefault(f"extract_text[{item['format']}]", []).append(elapsed)
+            for stage in ('extract_skills', 'scan_fields'):
+                samples[stage].append(timed(getattr(screener, stage), text)[1])
+            samples['calculate_match_score'].append(timed(screener.calculate_match_score, text, profile)[1])
+            samples['screen_resume'].append(timed(screener.screen_resume, item['path'], profile)[1])
+
+    report = {stage: summarize(values) for stage, values in samples.items()}
+    report.update({key: summarize(values) for key, values in sorted(by_format.items())})
+    return report
+
+
+def print_report(report):
+    print(f"{'stage':<28}{'count':>7}{'ops/s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, row in report.items():
+        print(f"{stage:<28}{row['count']:>7}{row['throughput_per_s']:>10}{row['mean_ms']:>10}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+
+
+def regressions(report, baseline, tolerance):
+    """Stages whose p95 grew by more than ``tolerance`` (a fraction) over the baseline."""
+    found = []
+    for stage, row in report.items():
+        before = baseline.get(stage)
+        if before and before['p95_ms'] > 0 and row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            found.append((stage, before['p95_ms'], row['p95_ms']))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resume screening stages")
+    parser.add_argument('--corpus', default='bench_corpus', help="corpus directory (generated if missing)")
+    parser.add_argument('--count', type=int, default=300, help="number of resumes to screen")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=1, help="passes over the corpus")
+    parser.add_argument('--cache', action='store_true', help="enable the feature cache (in the corpus directory)")
+    parser.add_argument('--sandbox', action='store_true', help="parse PDF/DOCX in a sandboxed subprocess")
+    parser.add_argument('--save', metavar='FILE', help="write the results as JSON")
+    parser.add_argument('--baseline', metavar='FILE', help="compare p95 latencies against saved results")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed p95 slowdown, as a fraction")
+    args = parser.parse_args()
+
+    resumes = load_corpus(args.corpus, args.count, args.seed)
+    cache_path = os.path.join(args.corpus, 'feature_cache.db') if args.cache else None
+    screener = ResumeScreener(cache_path=cache_path, extraction_limits=ExtractionLimits(), sandbox=args.sandbox)
+
+    report = run(screener, resumes, args.repeat)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for stage, before, after in found:
+            print(f"REGRESSION {stage}: p95 {before} ms -> {after} ms")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
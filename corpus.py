@@ -0,0 +1,57 @@
+"""
+Per-job applicant corpus statistics for BM25 match scoring.
+
+Only the job's own vocabulary (the tokens of its title and requirements) is
+tracked, so each job keeps a few dozen document frequencies no matter how many
+resumes it receives.
+
+The statistics are a snapshot: every score of a job is computed against the
+same one, so equal resumes get equal scores whenever they arrive. New
+applications are scored against the snapshot as it is; once the job has
+outgrown it, rescoring.rerank_outgrown_jobs rebuilds it and re-ranks every
+application in one pass.
+"""
+
+from ml.scoring import CorpusStats
+
+
+def create_corpus_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_corpus (
+            job_id INTEGER PRIMARY KEY,
+            doc_count INTEGER NOT NULL DEFAULT 0,
+            total_length INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_term_stats (
+            job_id INTEGER NOT NULL,
+            term TEXT NOT NULL,
+            df INTEGER NOT NULL,
+            PRIMARY KEY (job_id, term),
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        ) WITHOUT ROWID
+    ''')
+
+
+def load_job_stats(conn, job_id):
+    corpus = conn.execute('SELECT doc_count, total_length FROM job_corpus WHERE job_id = ?',
+                          (job_id,)).fetchone()
+    if corpus is None:
+        return CorpusStats()
+    df = dict(conn.execute('SELECT term, df FROM job_term_stats WHERE job_id = ?', (job_id,)).fetchall())
+    return CorpusStats(corpus[0], corpus[1], df)
+
+
+def replace_job_stats(conn, job_id, stats):
+    """Overwrite the job statistics with a rebuilt snapshot. The caller commits."""
+    conn.execute('''
+        INSERT INTO job_corpus (job_id, doc_count, total_length) VALUES (?, ?, ?)
+        ON CONFLICT (job_id) DO UPDATE SET doc_count = excluded.doc_count,
+                                           total_length = excluded.total_length
+    ''', (job_id, stats.doc_count, stats.total_length))
+    conn.execute('DELETE FROM job_term_stats WHERE job_id = ?', (job_id,))
+    conn.executemany('INSERT INTO job_term_stats (job_id, term, df) VALUES (?, ?, ?)',
+                     [(job_id, term, df) for term, df in stats.df.items() if df])
@@ -0,0 +1,71 @@
+"""
+Application counters by status, per job, per recruiter and per job seeker.
+
+Triggers on ``applications`` keep the counters in step with every write path
+(apply_job, update_status, AI shortlisting, the background worker), so the
+dashboards read a handful of rows instead of counting applications.
+"""
+
+COUNTER_TABLES = {
+    # table: (owner column, SQL giving the owner of NEW/OLD application)
+    'job_status_counts': ('job_id', '{row}.job_id'),
+    'recruiter_status_counts': ('recruiter_id', '(SELECT posted_by FROM jobs WHERE id = {row}.job_id)'),
+    'seeker_status_counts': ('user_id', '{row}.user_id'),
+}
+
+
+def _bump(table, owner_sql, row, delta):
+    column = COUNTER_TABLES[table][0]
+    owner = owner_sql.format(row=row)
+    return f'''
+            INSERT INTO {table} ({column}, status, count) VALUES ({owner}, COALESCE({row}.status, 'pending'), {delta})
+            ON CONFLICT ({column}, status) DO UPDATE SET count = count + ({delta});'''
+
+
+def create_counter_tables(cursor):
+    for table, (column, _) in COUNTER_TABLES.items():
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                {column} INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY ({column}, status)
+            ) WITHOUT ROWID
+        ''')
+
+    on_insert = ''.join(_bump(t, sql, 'NEW', 1) for t, (_, sql) in COUNTER_TABLES.items())
+    on_delete = ''.join(_bump(t, sql, 'OLD', -1) for t, (_, sql) in COUNTER_TABLES.items())
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS applications_count_insert AFTER INSERT ON applications
+        BEGIN{on_insert}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS applications_count_delete AFTER DELETE ON applications
+        BEGIN{on_delete}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS applications_count_update
+        AFTER UPDATE OF status, job_id, user_id ON applications
+        WHEN OLD.status IS NOT NEW.status OR OLD.job_id != NEW.job_id OR OLD.user_id != NEW.user_id
+        BEGIN{on_delete}{on_insert}
+        END
+    ''')
+
+    # Seed the counters from the applications already on file.
+    for table, (column, owner_sql) in COUNTER_TABLES.items():
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(f'''
+            INSERT INTO {table} ({column}, status, count)
+            SELECT {owner_sql.format(row='a')}, COALESCE(a.status, 'pending'), COUNT(*)
+            FROM applications a GROUP BY 1, 2
+        ''')
+
+
+def status_counts(conn, table, owner_id):
+    """``{status: count}`` for one job, recruiter or job seeker."""
+    column = COUNTER_TABLES[table][0]
+    rows = conn.execute(f'SELECT status, count FROM {table} WHERE {column} = ? AND count != 0',
+                        (owner_id,)).fetchall()
+    return {row['status']: row['count'] for row in rows}
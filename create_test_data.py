@@ -1,9 +1,15 @@
 """
 Generate test data and sample resumes for testing the recruitment system
 Run this script to create sample jobs and test resumes
+
+    python create_test_data.py                      # three hand-written PDFs
+    python create_test_data.py --corpus 500         # synthetic corpus (see generate_corpus)
 """
 
+import argparse
+import json
 import os
+import random
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
@@ -202,6 +208,143 @@ def generate_test_resumes():
     print("2. sarah_johnson_junior_dev.pdf - Expected: 50-70% match for Python jobs")
     print("3. michael_brown_data_analyst.pdf - Expected: 30-50% match for Python jobs")
 
+# ==================== SYNTHETIC CORPUS ====================
+
+SKILL_POOL = {
+    'backend': ['Python', 'Django', 'Flask', 'FastAPI', 'Java', 'Spring', 'Go', 'Node.js', 'REST API', 'GraphQL'],
+    'frontend': ['JavaScript', 'TypeScript', 'React', 'Angular', 'Vue', 'HTML', 'CSS'],
+    'data': ['SQL', 'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Pandas', 'NumPy', 'Tableau', 'Power BI', 'Excel'],
+    'ml': ['Machine Learning', 'Deep Learning', 'TensorFlow', 'PyTorch', 'Scikit-learn', 'NLP', 'Computer Vision'],
+    'ops': ['Docker', 'Kubernetes', 'AWS', 'Azure', 'GCP', 'Terraform', 'Jenkins', 'Linux', 'Bash', 'Git'],
+    'other': ['Agile', 'Scrum', 'Jira', 'Communication', 'Leadership', 'Customer Service', 'Sales'],
+}
+
+EDUCATION_MIX = [
+    # (degree, weight)
+    ('PhD in Computer Science', 0.05),
+    ('Master of Science in Data Science', 0.2),
+    ('Bachelor of Science in Computer Science', 0.5),
+    ('Diploma in Information Technology', 0.15),
+    ('High School Diploma', 0.1),
+]
+
+# size: (jobs, bullets per job, filler paragraphs)
+RESUME_SIZES = {
+    'small': (1, 3, 0),
+    'medium': (3, 5, 2),
+    'large': (8, 8, 30),
+}
+
+FILLER = ("Worked closely with product, design and operations teams to deliver features on schedule, "
+          "wrote documentation, reviewed pull requests and supported production incidents")
+
+
+def synthetic_resume(rng, index, size='medium', skill_focus=None):
+    """Resume data in the same shape as the hand-written samples, plus the ground truth."""
+    focus = skill_focus or rng.choice(list(SKILL_POOL))
+    skills = rng.sample(SKILL_POOL[focus], min(len(SKILL_POOL[focus]), rng.randint(3, 7)))
+    for other in rng.sample(list(SKILL_POOL), 2):
+        skills += rng.sample(SKILL_POOL[other], 2)
+    skills = list(dict.fromkeys(skills))
+
+    years = rng.choice([0, 1, 2, 3, 5, 7, 10, 15])
+    degree = rng.choices([d for d, _ in EDUCATION_MIX], weights=[w for _, w in EDUCATION_MIX])[0]
+    jobs, bullets, filler = RESUME_SIZES[size]
+
+    end = 2025
+    experience = []
+    for j in range(jobs):
+        start = end - max(1, years // jobs)
+        experience.append({
+            'title': f"{rng.choice(['Senior', 'Junior', 'Lead', ''])} {focus.title()} Engineer".strip(),
+            'company': f"Company {rng.randint(1, 999)}",
+            'duration': f"{start} - {end}",
+            'responsibilities': [f"Used {rng.choice(skills)} to build and maintain {rng.choice(['services', 'pipelines', 'dashboards', 'models'])}"
+                                 for _ in range(bullets)],
+        })
+        end = start
+
+    return {
+        'name': f"Candidate {index}",
+        'email': f"candidate{index}@example.com",
+        'phone': f"+1 (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        'summary': ". ".join([f"{focus.title()} professional with {years} years of experience"] + [FILLER] * filler),
+        'skills': ', '.join(skills),
+        'experience': experience,
+        'education': {'degree': degree, 'university': f"University {rng.randint(1, 99)}", 'year': str(end)},
+        'truth': {'focus': focus, 'skills': skills, 'experience_years': years, 'education': degree, 'size': size},
+    }
+
+
+def resume_lines(data):
+    lines = [data['name'], data['email'], data['phone'], '', 'Professional Summary', data['summary'], '',
+             'Technical Skills', data['skills'], '', 'Work Experience']
+    for exp in data['experience']:
+        lines += [exp['title'], f"{exp['company']} | {exp['duration']}"]
+        lines += [f"- {resp}" for resp in exp['responsibilities']]
+    lines += ['', 'Education', data['education']['degree'],
+              f"{data['education']['university']} | {data['education']['year']}"]
+    return lines
+
+
+def write_resume_txt(filename, data):
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(resume_lines(data)))
+
+
+def write_resume_docx(filename, data):
+    import docx
+    document = docx.Document()
+    for line in resume_lines(data):
+        document.add_paragraph(line)
+    document.save(filename)
+
+
+def write_resume_pdf(filename, data):
+    """Plain multi-page PDF; long lines are wrapped and pages break as needed."""
+    c = canvas.Canvas(filename, pagesize=letter)
+    width, height = letter
+    y_position = height - 1*inch
+    c.setFont("Helvetica", 11)
+    for line in resume_lines(data):
+        chunks = [line[i:i + 95] for i in range(0, len(line), 95)] or ['']
+        for chunk in chunks:
+            if y_position < 1*inch:
+                c.showPage()
+                c.setFont("Helvetica", 11)
+                y_position = height - 1*inch
+            c.drawString(1*inch, y_position, chunk)
+            y_position -= 0.2*inch
+    c.save()
+
+
+WRITERS = {'pdf': write_resume_pdf, 'docx': write_resume_docx, 'txt': write_resume_txt}
+
+
+def generate_corpus(count, out_dir='bench_corpus', formats=('pdf', 'docx', 'txt'),
+                    sizes=('small', 'medium', 'large'), seed=42):
+    """Write ``count`` synthetic resumes, cycling through formats and sizes.
+
+    The same seed always produces the same corpus, so benchmark runs compare
+    like with like. A manifest.json with each file's ground truth is written
+    alongside and returned.
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        size = sizes[(i // len(formats)) % len(sizes)]
+        data = synthetic_resume(rng, i, size)
+        path = os.path.join(out_dir, f"resume_{i:05d}_{size}.{fmt}")
+        WRITERS[fmt](path, data)
+        manifest.append({'path': path, 'format': fmt, **data['truth']})
+
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump({'seed': seed, 'resumes': manifest}, f, indent=1)
+    return manifest
+
+
 def print_sample_job_descriptions():
     """Print sample job descriptions for testing"""
     print("\n" + "="*60)
@@ -257,7 +400,20 @@ Nice to have:
 - Exposure to Agile development
     """)
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Generate sample resumes for the recruitment system")
+    parser.add_argument('--corpus', type=int, metavar='N', help="write N synthetic resumes instead of the samples")
+    parser.add_argument('--out', default='bench_corpus', help="output directory for --corpus")
+    parser.add_argument('--formats', default='pdf,docx,txt', help="comma-separated formats for --corpus")
+    parser.add_argument('--sizes', default='small,medium,large', help="comma-separated sizes for --corpus")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.corpus:
+        manifest = generate_corpus(args.corpus, args.out, args.formats.split(','), args.sizes.split(','), args.seed)
+        print(f"✅ Wrote {len(manifest)} resumes to {args.out}/")
+        return
+
     print("="*60)
     print("RECRUITMENT SYSTEM - TEST DATA GENERATOR")
     print("="*60)
@@ -283,4 +439,8 @@ if __name__ == "__main__":
         print("Install it with: pip install reportlab")
         print("\nOr create test resumes manually with these profiles:")
         print_sample_job_descriptions()
-        print("\nCreate text files or Word documents with similar content.")
\ No newline at end of file
+        print("\nCreate text files or Word documents with similar content.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+SQLite connection management.
+
+Each worker thread keeps one long-lived connection, opened with WAL
+journaling so readers never wait on a writer, a busy timeout instead of
+immediate "database is locked" errors, and a larger prepared-statement cache.
+Inside a request the connection is bound to Flask's app context by
+``get_db``; ``close_db`` hands it back at teardown, rolling back anything the
+handler left uncommitted.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from flask import g, has_app_context
+
+DATABASE = os.environ.get('DATABASE', 'database.db')
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+# Called with the duration of every statement when set (see metrics.init_app).
+query_observer = None
+
+_local = threading.local()
+
+
+class ObservedConnection(sqlite3.Connection):
+    """Reports the time each execute call takes to ``query_observer``."""
+
+    def execute(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            if query_observer is not None:
+                query_observer(time.perf_counter() - start)
+
+    def executemany(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            if query_observer is not None:
+                query_observer(time.perf_counter() - start)
+
+
+def connect(path=None):
+    """Open a new tuned connection; the caller owns (and closes) it."""
+    conn = sqlite3.connect(path or DATABASE, timeout=BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=STATEMENT_CACHE_SIZE,
+                           factory=ObservedConnection if query_observer is not None else sqlite3.Connection)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
+
+
+def _thread_connection():
+    # Never reuse a connection inherited across fork().
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        conn = connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def get_db():
+    """The calling thread's pooled connection, tied to the app context if any."""
+    if not has_app_context():
+        return _thread_connection()
+    if 'db' not in g:
+        g.db = _thread_connection()
+    return g.db
+
+
+def close_db(exception=None):
+    conn = g.pop('db', None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, migrations):
+    """Apply the ``(version, name, step)`` migrations newer than the database.
+
+    The version check is a single pragma read, so calling this on every
+    start-up is cheap once the schema is current. Upgrades run under an
+    immediate write lock, which makes concurrent workers wait and then find
+    nothing left to do.
+    """
+    if schema_version(conn) >= migrations[-1][0]:
+        return []
+
+    applied = []
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        current = schema_version(conn)
+        cursor = conn.cursor()
+        for version, name, step in migrations:
+            if version <= current:
+                continue
+            step(cursor)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            applied.append(name)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
@@ -0,0 +1,132 @@
+"""
+Bulk export of a job's screening results.
+
+Every exporter is a generator: applications are read in keyset batches by id
+and each one is encoded and yielded before the next batch is fetched, so a
+streamed response for 10k applicants holds one batch in memory, never the
+whole export. The ZIP writer streams too, using zipfile's support for
+unseekable outputs.
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+
+from reports import render_report, report_etag
+from werkzeug.utils import secure_filename
+
+EXPORT_BATCH_SIZE = 500
+CSV_COLUMNS = ['application_id', 'candidate_name', 'candidate_email', 'candidate_phone', 'status',
+               'match_score', 'recommendation', 'skill_match_percentage', 'skills_matched',
+               'experience_years', 'education_level', 'applied_at']
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'zip': 'application/zip',
+}
+
+
+def iter_applications(conn, job_id, batch_size=EXPORT_BATCH_SIZE):
+    """Every application of ``job_id``, in id order, one short query per batch."""
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT a.id, a.status, a.match_score, a.applied_at, a.resume_path, a.resume_name,
+                   a.screening_result, u.full_name, u.email, u.phone
+            FROM applications a
+            JOIN users u ON a.user_id = u.id
+            WHERE a.job_id = ? AND a.id > ?
+            ORDER BY a.id LIMIT ?
+        ''', (job_id, last_id, batch_size)).fetchall()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]['id']
+
+
+def _result(row):
+    return json.loads(row['screening_result']) if row['screening_result'] else {}
+
+
+# ------------------ CSV / JSONL ------------------ #
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        result = _result(row)
+        writer.writerow([
+            row['id'], row['full_name'], row['email'], row['phone'], row['status'],
+            row['match_score'], result.get('recommendation', ''), result.get('skill_match_percentage', ''),
+            '; '.join(result.get('skills_matched', [])), result.get('experience_years', ''),
+            result.get('education_level', ''), row['applied_at'],
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_jsonl(rows):
+    for row in rows:
+        yield json.dumps({
+            'application_id': row['id'],
+            'candidate_name': row['full_name'],
+            'candidate_email': row['email'],
+            'candidate_phone': row['phone'],
+            'status': row['status'],
+            'match_score': row['match_score'],
+            'applied_at': row['applied_at'],
+            'screening_result': _result(row) or None,
+        }) + '\n'
+
+
+# ------------------ ZIP ------------------ #
+class _Sink:
+    """Write-only file object whose contents are drained after every member."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Yield what has been written since the last drain, if anything."""
+        if self.chunks:
+            data = b''.join(self.chunks)
+            self.chunks = []
+            yield data
+
+
+def export_zip(rows, report_cache=None, chunk_size=1 << 16):
+    """Per-candidate PDF reports plus the original resumes, as one ZIP."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for row in rows:
+            prefix = f"{row['id']}_{secure_filename(row['full_name'] or '') or 'candidate'}"
+            if row['screening_result']:
+                # Reuse reports already rendered, but do not let one export
+                # flush the cache that interactive downloads rely on.
+                pdf = report_cache.get(report_etag(row['screening_result'])) if report_cache else None
+                if pdf is None:
+                    pdf = render_report(row['screening_result'])
+                archive.writestr(f"reports/{prefix}.pdf", pdf)
+                yield from sink.drain()
+
+            name = row['resume_name'] or os.path.basename(row['resume_path'])
+            try:
+                with open(row['resume_path'], 'rb') as src, \
+                        archive.open(f"resumes/{prefix}_{name}", 'w') as dst:
+                    for chunk in iter(lambda: src.read(chunk_size), b''):
+                        dst.write(chunk)
+                        yield from sink.drain()
+            except FileNotFoundError:
+                pass
+            yield from sink.drain()
+    yield from sink.drain()
@@ -0,0 +1,25 @@
+"""
+Gunicorn settings (see wsgi.py). The port and worker count come from the
+usual PORT and WEB_CONCURRENCY environment variables.
+"""
+
+import gc
+import os
+
+# Import the app once in the master and fork workers from it, so read-only
+# state is shared copy-on-write instead of built again in every worker.
+# GUNICORN_PRELOAD=0 turns this off, e.g. to compare memory use.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def pre_fork(server, worker):
+    # Objects the master created so far are never freed; keep the garbage
+    # collector from visiting them, which would write to (and so copy) their
+    # pages in each worker.
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Drain queued work without waiting for this worker's first request.
+    from app import start_background_worker
+    start_background_worker()
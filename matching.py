@@ -0,0 +1,180 @@
+"""
+Job matcher: rank active jobs against a single resume.
+
+Each job is indexed once, when it is posted, into ``job_terms`` (an inverted
+index of L2-normalised term weights, with required skills boosted) and
+``job_profiles`` (its required skills and stored JobProfile). Matching parses the resume once and
+lets SQLite sum the term products over the index, so only jobs that share
+terms with the resume are touched.
+"""
+
+import json
+import math
+import time
+
+from ml.profile import JobProfile, profile_fingerprint
+from ml.text import tokenize, term_weights
+from skills import store_job_skills
+
+SKILL_BOOST = 2.0
+# Terms found in more than this share of jobs carry almost no signal and
+# would make the index join touch most of the catalogue.
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+
+def create_matching_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_profiles (
+            job_id INTEGER PRIMARY KEY,
+            skills TEXT NOT NULL,
+            profile TEXT,
+            updated_at REAL NOT NULL,
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        )
+    ''')
+
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(job_profiles)')]
+    if 'profile' not in columns:
+        cursor.execute('ALTER TABLE job_profiles ADD COLUMN profile TEXT')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_terms (
+            term TEXT NOT NULL,
+            job_id INTEGER NOT NULL,
+            weight REAL NOT NULL,
+            PRIMARY KEY (term, job_id),
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_term_df (
+            term TEXT PRIMARY KEY,
+            df INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def get_job_profile(conn, screener, job):
+    """JobProfile of a ``jobs`` row: in-process LRU, then the stored copy, then built.
+
+    A freshly built profile is written back to job_profiles. The caller
+    commits, together with its own writes.
+    """
+    profile = screener.cached_profile(job['requirements'], job['title'])
+    if profile is not None:
+        return profile
+
+    fingerprint = profile_fingerprint(job['title'], job['requirements'], screener.feature_version)
+    row = conn.execute('SELECT profile FROM job_profiles WHERE job_id = ?', (job['id'],)).fetchone()
+    if row is not None and row[0]:
+        data = json.loads(row[0])
+        if data['fingerprint'] == fingerprint:
+            profile = JobProfile.from_dict(data, job['title'], job['requirements'])
+            screener.remember_profile(profile)
+            return profile
+
+    profile = screener.job_profile(job['requirements'], job['title'])
+    conn.execute('''
+        INSERT INTO job_profiles (job_id, skills, profile, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (job_id) DO UPDATE SET skills = excluded.skills, profile = excluded.profile,
+                                           updated_at = excluded.updated_at
+    ''', (job['id'], json.dumps(profile.required_skills), json.dumps(profile.to_dict()), time.time()))
+    return profile
+
+
+def index_job(conn, screener, job_id, title, description, requirements):
+    """(Re)build the profile and match vector of one job. The caller commits."""
+    profile = screener.job_profile(requirements, title)
+    skills = profile.required_skills
+    boost = {token: SKILL_BOOST for skill in skills for token in tokenize(skill)}
+    weights = term_weights(tokenize(f"{title}\n{requirements}\n{description}"), boost)
+
+    old_terms = [row[0] for row in conn.execute('SELECT term FROM job_terms WHERE job_id = ?', (job_id,))]
+    conn.executemany('UPDATE job_term_df SET df = df - 1 WHERE term = ?', [(t,) for t in old_terms])
+    conn.execute('DELETE FROM job_terms WHERE job_id = ?', (job_id,))
+
+    conn.executemany('INSERT INTO job_terms (term, job_id, weight) VALUES (?, ?, ?)',
+                     [(term, job_id, w) for term, w in weights.items()])
+    conn.executemany('''
+        INSERT INTO job_term_df (term, df) VALUES (?, 1)
+        ON CONFLICT (term) DO UPDATE SET df = df + 1
+    ''', [(term,) for term in weights])
+    conn.execute('INSERT OR REPLACE INTO job_profiles (job_id, skills, profile, updated_at) VALUES (?, ?, ?, ?)',
+                 (job_id, json.dumps(skills), json.dumps(profile.to_dict()), time.time()))
+    store_job_skills(conn, screener, job_id, requirements)
+
+
+def index_missing_jobs(conn, screener):
+    """Index jobs posted before the matcher existed."""
+    jobs = conn.execute('''
+        SELECT id, title, description, requirements FROM jobs
+        WHERE id NOT IN (SELECT job_id FROM job_profiles)
+    ''').fetchall()
+    for job in jobs:
+        index_job(conn, screener, job['id'], job['title'], job['description'], job['requirements'])
+    return len(jobs)
+
+
+def match_jobs(conn, features, limit=10):
+    """Top ``limit`` active jobs for already-extracted resume features."""
+    total_jobs = conn.execute('SELECT COUNT(*) FROM job_profiles').fetchone()[0]
+    if not total_jobs:
+        return []
+
+    resume_weights = term_weights(tokenize(features['text']))
+    if not resume_weights:
+        return []
+
+    # Weight resume terms by how rare they are across the job catalogue.
+    query = []
+    terms = list(resume_weights)
+    for i in range(0, len(terms), 500):
+        batch = terms[i:i + 500]
+        rows = conn.execute(
+            f"SELECT term, df FROM job_term_df WHERE df > 0 AND term IN ({','.join('?' * len(batch))})",
+            batch
+        ).fetchall()
+        for term, df in rows:
+            if total_jobs > 10 and df > total_jobs * MAX_DOCUMENT_FREQUENCY:
+                continue
+            idf = math.log(1 + total_jobs / df)
+            query.append((term, resume_weights[term] * idf))
+    if not query:
+        return []
+
+    norm = math.sqrt(sum(w * w for _, w in query))
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS match_query (term TEXT PRIMARY KEY, weight REAL NOT NULL)')
+    conn.execute('DELETE FROM match_query')
+    conn.executemany('INSERT INTO match_query (term, weight) VALUES (?, ?)',
+                     [(term, w / norm) for term, w in query])
+
+    # Pull a few extra candidates so the skill re-rank below can reorder them.
+    candidates = conn.execute('''
+        SELECT j.*, p.skills AS required_skills, SUM(jt.weight * q.weight) AS similarity
+        FROM match_query q
+        JOIN job_terms jt ON jt.term = q.term
+        JOIN jobs j ON j.id = jt.job_id AND j.status = 'active'
+        JOIN job_profiles p ON p.job_id = j.id
+        GROUP BY jt.job_id
+        ORDER BY similarity DESC
+        LIMIT ?
+    ''', (limit * 3,)).fetchall()
+    conn.execute('DELETE FROM match_query')
+
+    resume_skills = set(features['skills'])
+    matches = []
+    for job in candidates:
+        required = json.loads(job['required_skills'])
+        matched = [s for s in required if s in resume_skills]
+        coverage = len(matched) / len(required) if required else 0.5
+        similarity = min(job['similarity'], 1.0)
+        score = 100 * (0.6 * coverage + 0.4 * math.sqrt(similarity))
+        matches.append({
+            'job': job,
+            'match_score': round(score, 2),
+            'skills_matched': matched,
+            'skills_missing': [s for s in required if s not in resume_skills],
+        })
+    matches.sort(key=lambda m: m['match_score'], reverse=True)
+    return matches[:limit]
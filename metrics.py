@@ -0,0 +1,265 @@
+"""
+Optional timing instrumentation, exposed in the Prometheus text format.
+
+Set METRICS_ENABLED=1 to record latency histograms for every ResumeScreener
+stage and every route, SQLite statement counts and time per request, and
+text-extraction failures by file type; GET /metrics renders them.
+
+Each process keeps its own numbers in memory. With METRICS_DIR set, every
+process also writes a snapshot there (at most every ``flush_interval``
+seconds) and /metrics merges all snapshots, so the totals are correct no
+matter which gunicorn worker answers the scrape. Point METRICS_DIR at an
+empty directory on every deploy, as with prometheus_client's multiprocess
+mode; snapshots of exited workers are kept so counters never go backwards.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from flask import g, has_app_context, request
+
+import database
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+METRICS = {
+    # name: (type, help, buckets)
+    'recruitment_stage_duration_seconds': (
+        'histogram', 'Time spent in each ResumeScreener stage.', LATENCY_BUCKETS),
+    'recruitment_request_duration_seconds': (
+        'histogram', 'Time to produce a response, by endpoint.', LATENCY_BUCKETS),
+    'recruitment_db_queries_per_request': (
+        'histogram', 'SQLite statements executed per request.', QUERY_COUNT_BUCKETS),
+    'recruitment_db_seconds_per_request': (
+        'histogram', 'Time spent executing SQLite statements per request.', LATENCY_BUCKETS),
+    'recruitment_extraction_failures_total': (
+        'counter', 'Resumes from which no text could be extracted, by file type.', None),
+}
+
+SCREENER_STAGES = ('extract_features', 'extract_text', 'extract_skills', 'scan_fields',
+                   'calculate_match_score', 'rank_resumes', 'screen_features',
+                   'screen_resume', 'screen_batch')
+
+
+class Registry:
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+        if directory:
+            atexit.register(self.flush)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._histograms = {}
+        self._counters = {}
+        self._last_flush = time.monotonic()
+
+    def _check_fork(self):
+        # A forked worker must not report (or overwrite) its parent's numbers.
+        if self._pid != os.getpid():
+            self._reset()
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_fork()
+            values = self._histograms.get(key)
+            if values is None:
+                # Per-bucket counts (cumulated when rendered), then sum and count.
+                values = self._histograms[key] = [0] * len(buckets) + [0.0, 0]
+            index = bisect.bisect_left(buckets, value)
+            if index < len(buckets):
+                values[index] += 1
+            values[-2] += value
+            values[-1] += 1
+        self._maybe_flush()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_fork()
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def timer(self, name, **labels):
+        return _Timer(self, name, labels)
+
+    # ------------------ MULTI-PROCESS ------------------ #
+    def snapshot(self):
+        with self._lock:
+            self._check_fork()
+            return {
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()],
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+            }
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f"metrics_{pid}.json")
+
+    def flush(self):
+        if not self.directory:
+            return
+        data = json.dumps(self.snapshot())
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._last_flush = time.monotonic()
+
+    def _maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _merged(self):
+        snapshots = [self.snapshot()]
+        if self.directory:
+            own = self._snapshot_path(os.getpid())
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+                if path == own:
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        histograms, counters = {}, {}
+        for snapshot in snapshots:
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+        return histograms, counters
+
+    # ------------------ EXPOSITION ------------------ #
+    def collect(self):
+        """All processes' metrics in the Prometheus text format (version 0.0.4)."""
+        histograms, counters = self._merged()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'histogram':
+                for (metric, labels), values in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets, values):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {values[-1]}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(values[-2])}")
+                    lines.append(f"{name}_count{_labels(labels)} {values[-1]}")
+            else:
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ==================== INSTRUMENTATION ====================
+
+def instrument_screener(screener, registry):
+    """Time the screener's stages by wrapping them on this instance.
+
+    Internal calls go through ``self``, so the stages screen_resume and
+    extract_features run are timed too. Screeners built inside pool worker
+    processes are not instrumented.
+    """
+    for stage in SCREENER_STAGES:
+        setattr(screener, stage, _timed_stage(registry, stage, getattr(screener, stage)))
+
+    extract_text = screener.extract_text
+
+    def counted_extract_text(file_path):
+        text = extract_text(file_path)
+        if not text:
+            registry.inc('recruitment_extraction_failures_total',
+                         format=Path(file_path).suffix.lower().lstrip('.') or 'none')
+        return text
+
+    screener.extract_text = counted_extract_text
+
+
+def _timed_stage(registry, stage, method):
+    def timed(*args, **kwargs):
+        with registry.timer('recruitment_stage_duration_seconds', stage=stage):
+            return method(*args, **kwargs)
+    return timed
+
+
+def init_app(app, registry):
+    """Record per-route latency and SQLite usage for every request."""
+
+    def count_query(elapsed):
+        if has_app_context() and 'db_queries' in g:
+            g.db_queries += 1
+            g.db_seconds += elapsed
+
+    database.query_observer = count_query
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_seconds = 0.0
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            registry.observe('recruitment_request_duration_seconds', time.perf_counter() - started,
+                             endpoint=endpoint, method=request.method, status=response.status_code)
+            registry.observe('recruitment_db_queries_per_request', g.pop('db_queries'), endpoint=endpoint)
+            registry.observe('recruitment_db_seconds_per_request', g.pop('db_seconds'), endpoint=endpoint)
+        return response
@@ -0,0 +1,164 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once, in order, inside the transaction that also bumps
+``PRAGMA user_version`` (see database.migrate). Add new steps to the end of
+MIGRATIONS; never edit one that has shipped.
+"""
+
+import sqlite3
+
+from werkzeug.security import generate_password_hash
+
+from analytics import create_analytics_tables
+from corpus import create_corpus_tables
+from counters import create_counter_tables
+from matching import create_matching_tables
+from rescoring import create_rescoring_tables
+from search import create_job_search, create_resume_search, spell_resume_symbols
+from skills import create_skill_tables
+from storage import create_resume_storage
+from tasks import create_screening_queue, create_task_tables
+
+
+def base_schema(cursor):
+    # Everything init_db used to create on import; IF NOT EXISTS lets this
+    # adopt databases that predate the migration runner.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            full_name TEXT,
+            phone TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) 
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            requirements TEXT NOT NULL,
+            location TEXT,
+            job_type TEXT,
+            experience_level TEXT,
+            salary_range TEXT,
+            posted_by INTEGER,
+            status TEXT DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (posted_by) REFERENCES users (id)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS applications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            resume_path TEXT NOT NULL,
+            cover_letter TEXT,
+            match_score REAL,
+            skills_matched TEXT,
+            experience_years INTEGER,
+            education_level TEXT,
+            status TEXT DEFAULT 'pending',
+            screening_result TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (job_id) REFERENCES jobs (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    
+    create_task_tables(cursor)
+    create_matching_tables(cursor)
+    create_corpus_tables(cursor)
+    
+    try:
+        cursor.execute(
+            "INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)",
+            ('recruiter1', 'recruiter@company.com', generate_password_hash('recruiter123'), 'recruiter', 'Demo Recruiter')
+        )
+        cursor.execute(
+            "INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)",
+            ('jobseeker1', 'jobseeker@email.com', generate_password_hash('jobseeker123'), 'jobseeker', 'Demo Job Seeker')
+        )
+    except sqlite3.IntegrityError:
+        pass
+
+
+def hot_query_indexes(cursor):
+    # apply_job prevented duplicates only with a racy SELECT; keep the first
+    # application of each candidate so the unique index can be built. The
+    # later ones are copied to duplicate_applications, with the id of the
+    # application kept in their place, before they are removed.
+    duplicates = '''
+        SELECT id FROM applications a WHERE EXISTS (
+            SELECT 1 FROM applications b
+            WHERE b.job_id = a.job_id AND b.user_id = a.user_id AND b.id < a.id
+        )
+    '''
+    removed = cursor.execute(f'SELECT COUNT(*) FROM ({duplicates})').fetchone()[0]
+    if removed:
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS duplicate_applications AS
+            SELECT (SELECT MIN(b.id) FROM applications b
+                    WHERE b.job_id = a.job_id AND b.user_id = a.user_id) AS kept_id, a.*
+            FROM applications a WHERE a.id IN ({duplicates})
+        ''')
+        cursor.execute(f'DELETE FROM shortlist_task_items WHERE application_id IN ({duplicates})')
+        cursor.execute(f'DELETE FROM applications WHERE id IN ({duplicates})')
+        print(f"Moved {removed} duplicate application(s) to duplicate_applications")
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_job_user ON applications (job_id, user_id)')
+
+    # Pending applications of a job (ai_shortlist_all, task snapshots).
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_applications_job_status ON applications (job_id, status)')
+    # view_applications ordering.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_applications_job_score
+        ON applications (job_id, match_score DESC, applied_at DESC)
+    ''')
+    # jobseeker_dashboard counts and list.
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_applications_user_status ON applications (user_id, status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_applications_user_applied ON applications (user_id, applied_at DESC)')
+    # recruiter_dashboard job list and the active job listing.
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_posted_by ON jobs (posted_by, created_at DESC)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at DESC)')
+    # Queue polling in claim_task.
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_shortlist_tasks_status ON shortlist_tasks (status, id)')
+
+
+def keyset_indexes(cursor):
+    # Pagination orders every list by a unique key ending in id; the indexes
+    # carry that full key so each page is a single index range scan.
+    cursor.execute('DROP INDEX IF EXISTS idx_applications_job_score')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_applications_job_score
+        ON applications (job_id, match_score DESC, applied_at DESC, id DESC)
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_applications_user_applied')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_applications_user_applied
+        ON applications (user_id, applied_at DESC, id DESC)
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_jobs_status')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at DESC, id DESC)')
+
+
+MIGRATIONS = [
+    (1, 'base schema', base_schema),
+    (2, 'indexes for hot queries', hot_query_indexes),
+    (3, 'dashboard counters', create_counter_tables),
+    (4, 'keyset pagination indexes', keyset_indexes),
+    (5, 'application screening queue', create_screening_queue),
+    (6, 'content-addressed resume storage', create_resume_storage),
+    (7, 'analytics rollups', create_analytics_tables),
+    (8, 'job full-text search', create_job_search),
+    (9, 'resume full-text search', create_resume_search),
+    (10, 'normalized skills', create_skill_tables),
+    (11, 'scoring versions', create_rescoring_tables),
+    (12, 'symbol skills in resume search', spell_resume_symbols),
+]
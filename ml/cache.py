@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+def file_digest(path, chunk_size=1 << 16):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+# A hit only rewrites its access time once the stored one is this old, so
+# most reads stay reads; LRU order does not need more precision.
+ACCESS_RESOLUTION = 3600
+# Entries of other extractor versions are kept this long after their last
+# use, so processes on different versions (a rolling deploy) can share the
+# cache without wiping each other's entries.
+OTHER_VERSION_TTL = 24 * 3600
+# Failed extractions are cached too, so a file that times out does not cost
+# the full timeout on every re-screen; after this long it is tried again, in
+# case the failure was the machine's rather than the file's.
+FAILURE_RETRY = 7 * 24 * 3600
+
+
+class FeatureCache:
+    """SQLite cache of extracted resume text and features.
+
+    Entries are keyed by the SHA-256 of the file contents and the extractor
+    version, so the same resume is parsed once per version no matter how
+    often it is screened. Entries of other versions expire after
+    OTHER_VERSION_TTL without use, and the cache is trimmed
+    least-recently-used first once it grows past ``max_bytes``; the total
+    size is kept up to date by triggers rather than summed on every write.
+    A file that could not be extracted is stored as ``{'failure': reason}``
+    under the same key (see put_failure).
+    """
+
+    def __init__(self, path, version, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.version = version
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connect(self):
+        # Connections must not cross a fork, so reconnect in child processes.
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._create_tables(conn)
+            conn.execute('DELETE FROM cached_features WHERE version != ? AND accessed_at < ?',
+                         (self.version, time.time() - OTHER_VERSION_TTL))
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _create_tables(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cached_features (
+                digest TEXT NOT NULL,
+                version TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (digest, version)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cached_features_accessed ON cached_features (accessed_at)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                total INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO cache_size (id, total)
+            SELECT 0, COALESCE(SUM(size), 0) FROM cached_features
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS cached_features_insert AFTER INSERT ON cached_features BEGIN
+                UPDATE cache_size SET total = total + NEW.size WHERE id = 0;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS cached_features_delete AFTER DELETE ON cached_features BEGIN
+                UPDATE cache_size SET total = total - OLD.size WHERE id = 0;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS cached_features_resize AFTER UPDATE OF size ON cached_features BEGIN
+                UPDATE cache_size SET total = total + NEW.size - OLD.size WHERE id = 0;
+            END
+        ''')
+        # The table of earlier releases held one version per digest; drop it
+        # once no process has used it for OTHER_VERSION_TTL.
+        legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'features'").fetchone()
+        if legacy:
+            last_used = conn.execute('SELECT MAX(accessed_at) FROM features').fetchone()[0]
+            if last_used is None or last_used < time.time() - OTHER_VERSION_TTL:
+                conn.execute('DROP TABLE features')
+
+    def get(self, digest):
+        """The cached features or failure of ``digest``, or None on a miss."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute('SELECT payload, accessed_at FROM cached_features WHERE digest = ? AND version = ?',
+                               (digest, self.version)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] >= ACCESS_RESOLUTION:
+                conn.execute('UPDATE cached_features SET accessed_at = ? WHERE digest = ? AND version = ?',
+                             (now, digest, self.version))
+                conn.commit()
+        entry = json.loads(zlib.decompress(row[0]))
+        if 'failure' in entry and entry['failed_at'] < time.time() - FAILURE_RETRY:
+            return None
+        return entry
+
+    def put_failure(self, digest, reason):
+        """Remember that ``digest`` could not be extracted, and why."""
+        self.put(digest, {'failure': reason, 'failed_at': time.time()})
+
+    def put(self, digest, features):
+        payload = zlib.compress(json.dumps(features).encode('utf-8'))
+        with self._lock:
+            conn = self._connect()
+            conn.execute('''
+                INSERT INTO cached_features (digest, version, payload, size, accessed_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (digest, version) DO UPDATE SET payload = excluded.payload, size = excluded.size,
+                                                            accessed_at = excluded.accessed_at
+            ''', (digest, self.version, payload, len(payload), time.time()))
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT total FROM cache_size WHERE id = 0').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Free a little more than needed so every put does not trigger a trim.
+        target = self.max_bytes * 0.9
+        freed = 0
+        stale = []
+        for digest, version, size in conn.execute(
+                'SELECT digest, version, size FROM cached_features ORDER BY accessed_at'):
+            stale.append((digest, version))
+            freed += size
+            if total - freed <= target:
+                break
+        conn.executemany('DELETE FROM cached_features WHERE digest = ? AND version = ?', stale)
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM cached_features')
+            conn.commit()
@@ -0,0 +1,152 @@
+import importlib
+import multiprocessing
+import os
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class ExtractionLimits:
+    """Caps applied to a single resume extraction.
+
+    ``max_chars`` also stops extraction early: a resume never needs more text
+    than this to be screened. ``timeout`` and ``memory_mb`` only apply when
+    extraction runs in a sandboxed subprocess.
+    """
+
+    def __init__(self, max_pages=30, max_chars=100_000, timeout=10.0, memory_mb=512):
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+
+
+# ------------------ PARSER MODULES ------------------ #
+# PyPDF2 and python-docx take longer to import than the rest of the app, and
+# most processes (the CLI, workers screening text resumes) never need them,
+# so each is imported on first use.
+PARSER_MODULES = {'.pdf': 'PyPDF2', '.docx': 'docx'}
+
+
+def load_parser(suffix):
+    """The parser module for files with ``suffix``, or None if they need none."""
+    name = PARSER_MODULES.get(suffix)
+    return importlib.import_module(name) if name else None
+
+
+# ------------------ BOUNDED READERS ------------------ #
+def read_pdf(path, limits):
+    # Pages are parsed one at a time and collected in a list, so the text is
+    # joined once instead of being re-copied on every page.
+    chunks = []
+    size = 0
+    with open(path, 'rb') as file:
+        reader = load_parser('.pdf').PdfReader(file)
+        for number, page in enumerate(reader.pages):
+            if number >= limits.max_pages:
+                break
+            page_text = page.extract_text()
+            if page_text:
+                chunks.append(page_text)
+                size += len(page_text)
+                if size >= limits.max_chars:
+                    break
+    return "".join(chunks)[:limits.max_chars]
+
+
+def read_docx(path, limits):
+    chunks = []
+    size = 0
+    for paragraph in load_parser('.docx').Document(path).paragraphs:
+        chunks.append(paragraph.text)
+        size += len(paragraph.text) + 1
+        if size >= limits.max_chars:
+            break
+    return "\n".join(chunks)[:limits.max_chars]
+
+
+def read_txt(path, limits):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read(limits.max_chars)
+
+
+READERS = {'.pdf': read_pdf, '.docx': read_docx, '.txt': read_txt}
+
+
+def extract_file(path, limits):
+    reader = READERS.get(Path(path).suffix.lower())
+    if reader is None:
+        return ""
+    return reader(path, limits)
+
+
+# ------------------ SANDBOX ------------------ #
+def _limit_memory(memory_mb):
+    if resource is None or not memory_mb:
+        return
+    # RLIMIT_AS counts the address space inherited from the parent, so the
+    # cap is added on top of what the process already maps.
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        current = 0
+    cap = current + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (cap, cap))
+
+
+def _limit_cpu(timeout):
+    # Backstop for a child whose parent died before it could kill it.
+    if resource is None or not timeout:
+        return
+    seconds = int(timeout) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds))
+
+
+def _sandbox_main(conn, path, limits):
+    try:
+        _limit_memory(limits.memory_mb)
+        _limit_cpu(limits.timeout)
+        conn.send(('ok', extract_file(path, limits)))
+    except BaseException as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+
+
+def extract_sandboxed(path, limits):
+    """Run extract_file in a child process, killing it past ``limits.timeout``."""
+    # Import the parser here, once, so forked children inherit it instead of
+    # each importing it again.
+    load_parser(Path(path).suffix.lower())
+    ctx = _context()
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_sandbox_main, args=(sender, path, limits))
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(limits.timeout):
+            raise ExtractionError(f"extraction timed out after {limits.timeout}s")
+        status, payload = receiver.recv()
+    except EOFError:
+        raise ExtractionError(f"extraction process died (exit code {process.exitcode})")
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+    if status != 'ok':
+        raise ExtractionError(payload)
+    return payload
@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ml.resume_screening import ResumeScreener
+
+# Each pool process builds its own screener (and cache connection) once.
+_worker_screener = None
+
+
+def _init_worker(cache_path, cache_max_bytes, extraction_limits, sandbox):
+    global _worker_screener
+    _worker_screener = ResumeScreener(cache_path=cache_path, cache_max_bytes=cache_max_bytes,
+                                      extraction_limits=extraction_limits, sandbox=sandbox)
+
+
+def _extract(screener, item):
+    key, resume_path = item
+    try:
+        return key, screener.extract_features(resume_path), None
+    except Exception as e:
+        return key, None, str(e)
+
+
+def _extract_in_worker(item):
+    return _extract(_worker_screener, item)
+
+
+def _chunked(results, chunk_size):
+    chunk = []
+    for result in results:
+        chunk.append(result)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _score_chunk(screener, chunk, job_requirements, job_title, stats):
+    results = screener.screen_batch([features for _, features, _ in chunk], job_requirements, job_title, stats)
+    for (_, _, error), result in zip(chunk, results):
+        if error:
+            result['error'] = error
+    return [(key, result) for (key, _, _), result in zip(chunk, results)]
+
+
+def screen_resumes(screener, items, job_requirements, job_title="", stats=None, max_workers=None, chunk_size=25):
+    """Screen ``(key, resume_path)`` pairs and yield results in chunks.
+
+    Each chunk is a list of ``(key, result)`` tuples, in input order, so the
+    caller can persist one chunk per short transaction. Parsing is spread
+    across a bounded process pool when more than one worker is allowed;
+    match scoring runs here, one vectorised BM25 pass per chunk. Closing
+    the generator cancels the parsing not yet started.
+    """
+    items = list(items)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(items)))
+
+    if max_workers == 1:
+        extracted = (_extract(screener, item) for item in items)
+        for chunk in _chunked(extracted, chunk_size):
+            yield _score_chunk(screener, chunk, job_requirements, job_title, stats)
+        return
+
+    cache = screener.cache
+    initargs = (cache.path, cache.max_bytes) if cache is not None else (None, 0)
+    initargs += (screener.extraction_limits, screener.sandbox)
+    pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=initargs)
+    finished = False
+    try:
+        # Small map chunks keep every worker busy while results stream back in order.
+        extracted = pool.map(_extract_in_worker, items, chunksize=max(1, min(8, len(items) // (max_workers * 4))))
+        for chunk in _chunked(extracted, chunk_size):
+            yield _score_chunk(screener, chunk, job_requirements, job_title, stats)
+        finished = True
+    finally:
+        # A caller that stops early (a lost task lease) closes the generator;
+        # drop the extractions still queued instead of waiting for them.
+        pool.shutdown(wait=finished, cancel_futures=not finished)
@@ -0,0 +1,67 @@
+import hashlib
+
+from ml.scoring import BM25Scorer
+
+DEFAULT_WEIGHTS = {
+    'skill_match': 0.2,
+    'experience_bonus': {3: 5, 5: 5},
+    'education_bonus': {3: 5, 4: 5},
+}
+
+
+def profile_fingerprint(job_title, job_requirements, feature_version):
+    text = f"{feature_version}\0{job_title}\0{job_requirements}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class JobProfile:
+    """Everything screening needs to know about a job, derived once.
+
+    Holds the skills required by the job, its tokenised query (title plus
+    requirements) and the score weights. The fingerprint ties the profile to
+    the job text and the screener's feature version, so a stored profile is
+    rebuilt as soon as either changes.
+    """
+
+    def __init__(self, job_title, job_requirements, required_skills, query_tokens,
+                 fingerprint, weights=None):
+        self.job_title = job_title
+        self.job_requirements = job_requirements
+        self.required_skills = list(required_skills)
+        self.query_tokens = list(query_tokens)
+        self.fingerprint = fingerprint
+        self.weights = weights or DEFAULT_WEIGHTS
+        self._scorer = None
+
+    @property
+    def scorer(self):
+        if self._scorer is None:
+            self._scorer = BM25Scorer(self.query_tokens)
+        return self._scorer
+
+    @property
+    def vocabulary(self):
+        return self.scorer.vocabulary
+
+    def to_dict(self):
+        return {
+            'fingerprint': self.fingerprint,
+            'required_skills': self.required_skills,
+            'query_tokens': self.query_tokens,
+            # JSON object keys must be strings.
+            'weights': {
+                'skill_match': self.weights['skill_match'],
+                'experience_bonus': {str(k): v for k, v in self.weights['experience_bonus'].items()},
+                'education_bonus': {str(k): v for k, v in self.weights['education_bonus'].items()},
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data, job_title, job_requirements):
+        weights = data['weights']
+        return cls(job_title, job_requirements, data['required_skills'], data['query_tokens'],
+                   data['fingerprint'], {
+                       'skill_match': weights['skill_match'],
+                       'experience_bonus': {int(k): v for k, v in weights['experience_bonus'].items()},
+                       'education_bonus': {int(k): v for k, v in weights['education_bonus'].items()},
+                   })
@@ -1,10 +1,52 @@
 import re
+import bisect
+import datetime
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
-import PyPDF2
-import docx
+from ml.cache import FeatureCache, file_digest
+from ml.extraction import ExtractionLimits, extract_sandboxed, read_docx, read_pdf, read_txt
+from ml.profile import JobProfile, profile_fingerprint
+from ml.scoring import CorpusStats
+from ml.text import tokenize
+
+# Bump whenever text extraction or a feature extractor changes behaviour,
+# so cached features from the old code are discarded.
+EXTRACTOR_VERSION = 8
+# Bump whenever screen_features or the score weights change, so stored
+# scores are recomputed (see rescoring.py).
+SCORING_VERSION = 2
+# Skills this long or shorter also end at a hyphen (see _build_skill_matcher).
+SHORT_SKILL = 2
+
+
+def employment_years(ranges):
+    """Years covered by ``(start, end)`` year ranges, overlaps counted once.
+
+    ``end`` may be 'present' (or 'current', 'now', 'today'). Ranges that run
+    backwards or span more than 50 years are ignored.
+    """
+    this_year = datetime.date.today().year
+    spans = []
+    for start, end in ranges:
+        start, end = int(start), (int(end) if end.isdigit() else this_year)
+        if start <= end <= this_year and end - start <= 50:
+            spans.append((start, end))
+    total, covered_to = 0, None
+    for start, end in sorted(spans):
+        if covered_to is not None and start < covered_to:
+            start = covered_to
+        if end > start:
+            total += end - start
+        covered_to = end if covered_to is None else max(covered_to, end)
+    return total
+
 
 class ResumeScreener:
-    def __init__(self):
+    def __init__(self, cache_path=None, cache_max_bytes=256 * 1024 * 1024, profile_cache_size=256,
+                 extraction_limits=None, sandbox=False):
         self.skills_database = {
             'programming': ['python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'go', 'rust', 'typescript'],
             'web': ['html', 'css', 'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'spring', 'express', 'fastapi'],
@@ -24,40 +66,157 @@ class ResumeScreener:
             'high school': 1, 'secondary': 1
         }
 
+        self._build_skill_matcher()
+        self._build_field_matcher()
+
+        # PDF and DOCX parsing runs in a killable child process when
+        # ``sandbox`` is set; the page and size caps apply either way.
+        self.extraction_limits = extraction_limits or ExtractionLimits()
+        self.sandbox = sandbox
+
+        # The skill and education tables feed the cached features, so they
+        # are part of the cache version alongside EXTRACTOR_VERSION.
+        taxonomy = json.dumps([self.skills_database, self.education_levels], sort_keys=True)
+        self.feature_version = f"{EXTRACTOR_VERSION}-{hashlib.sha1(taxonomy.encode()).hexdigest()[:12]}"
+        self.scoring_version = f"{SCORING_VERSION}-{self.feature_version}"
+        self.cache = FeatureCache(cache_path, self.feature_version, cache_max_bytes) if cache_path else None
+        self.profile_cache_size = profile_cache_size
+        self._profiles = OrderedDict()
+        self._profiles_lock = threading.Lock()
+        # Why the last extract_text on this thread came back empty.
+        self._failure = threading.local()
+
+    # ------------------ SKILL MATCHER ------------------ #
+    def _build_skill_matcher(self):
+        # One alternation over every skill, longest first so that
+        # 'react native' wins over 'react' and 'c++' over 'c'. The
+        # lookarounds act as token boundaries that also work for skills
+        # ending in symbols ('c++', 'c#', 'node.js'), so 'r' no longer
+        # matches inside 'docker' or 'go' inside 'google'. One rule decides
+        # where a skill token ends: letters, digits, '+', '#' and '&' continue
+        # it ('R&D', 'AT&T'), while spaces, punctuation and '/' separate
+        # ('python/django', 'R/Python'). Skills of up to SHORT_SKILL
+        # characters are everyday words or letters too, so a hyphen also
+        # continues them ('go-to person', 'R-squared').
+        terms = sorted({s.lower() for skills in self.skills_database.values() for s in skills},
+                       key=len, reverse=True)
+
+        def bounded(alternatives):
+            edge = r'a-z0-9+#&' if len(alternatives[0]) > SHORT_SKILL else r'a-z0-9+#&\-'
+            return f'(?<![{edge}])(?:' + '|'.join(re.escape(t) for t in alternatives) + f')(?![{edge}])'
+
+        # Short skills sort last, so they form their own group.
+        words = [t for t in terms if len(t) > SHORT_SKILL]
+        short = [t for t in terms if len(t) <= SHORT_SKILL]
+        self._skill_pattern = re.compile('|'.join(bounded(group) for group in (words, short) if group))
+
+        # A longer match can contain shorter skills ('react native' also
+        # means 'react'); record them so the single pass still finds both.
+        self._skill_implies = {}
+        for term in terms:
+            implied = {term}
+            for other in terms:
+                if other != term and re.search(bounded([other]), term):
+                    implied.add(other)
+            self._skill_implies[term] = implied
+
+        self._skill_order = [(cat, [(s, s.lower()) for s in skills])
+                             for cat, skills in self.skills_database.items()]
+
+    # ------------------ FIELD MATCHER ------------------ #
+    def _build_field_matcher(self):
+        # Email and phone keep only their first hit, so they are searched
+        # for rather than collected with findall.
+        self._email_pattern = re.compile(r'\b[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}\b', re.IGNORECASE)
+        self._phone_pattern = re.compile(r'[\+\(]?[0-9][0-9 .\-\(\)]{8,}[0-9]')
+
+        # Experience phrases ("5+ years of experience", "3-5 years exp") and
+        # employment dates ("2018 - 2022", "2019 to present") share one pass.
+        # The pattern starts with a plain digit class so the regex engine can
+        # skip straight to numbers; the lookbehind that follows keeps a match
+        # from starting inside one.
+        self._number_pattern = re.compile(
+            r'[0-9](?<![0-9][0-9])(?:'
+            r'(?P<years>[0-9]*(?:\s*-\s*[0-9]+)?)\+?\s*years?(?P<stated>\s*(?:of)?\s*(?:experience|exp))?'
+            r'|(?<=[12])[0-9]{3}\s*(?:-|\u2013|\u2014|to|until)\s*'
+            r'(?P<end>(?:19|20)[0-9]{2}|present|current|now|today)(?![a-z0-9])'
+            r')')
+        self._experience_label = re.compile(r'experience\s*:\s*$')
+
+        # Study periods are not employment: a date range is skipped when its
+        # line names a school or degree, or when it sits in a section whose
+        # heading (the closest known one above it) is about education.
+        self._education_line = re.compile(
+            r'\b(?:education|universit(?:y|ies)|college|school|institute|academy|faculty|degree|diploma'
+            r'|bachelor\'?s?|master\'?s|masters|master of|ph\.?d|doctorate|gpa|graduat(?:ed|ion)|coursework'
+            r'|b\.?sc|m\.?sc|b\.?tech|m\.?tech|mba)\b')
+        self._section_heading = re.compile(
+            r'^[ \t]*(?:(?P<education>education(?:al background)?(?: (?:and|&) training)?|academic [a-z]+'
+            r'|qualifications)|(?:work |professional |relevant )?experience|employment(?: history)?'
+            r'|(?:work|career) history|projects|(?:technical )?skills|certifications|summary|profile'
+            r'|languages|interests|awards|publications|references|volunteering)[ \t]*:?[ \t]*$',
+            re.MULTILINE)
+
+        # Degrees are tried from the highest level down (ties in table
+        # order), each as a whole token, so 'ms', 'be' and 'ba' no longer
+        # match inside 'teams', 'been' or 'database'. Two-letter
+        # abbreviations are also everyday words ('to be', 'MS Office'), so
+        # they are matched case-sensitively in the original text and only
+        # count dotted ('M.S.') or in capitals followed by what a degree is
+        # followed by: 'MS in', 'BE of', 'BA (Hons)', 'MS,' or the line end.
+        self._degree_checks = []
+        ranked = sorted(enumerate(self.education_levels.items()), key=lambda item: (-item[1][1], item[0]))
+        for _, (degree, level) in ranked:
+            if degree.isalpha() and len(degree) <= 2:
+                dotted = '.'.join(degree) + '.'
+                letters = r'\.?'.join(re.escape(c) for c in degree.upper())
+                pattern = re.compile(
+                    r'(?<![A-Za-z0-9.])(?:' + letters + r'\.(?![A-Za-z0-9])'
+                    r'|' + re.escape(degree.upper()) + r'(?=[ \t]*(?:(?:in|of)\b|[(,\-\u2013\u2014]|$)))',
+                    re.MULTILINE)
+                self._degree_checks.append((degree, level, (degree, dotted[:-1]), pattern, True))
+            else:
+                pattern = re.compile(r'(?<![a-z0-9])' + re.escape(degree) + r'(?![a-z0-9])')
+                self._degree_checks.append((degree, level, (degree,), pattern, False))
+        self._last_scan = (None, None)
+
     # ------------------ TEXT EXTRACTION ------------------ #
     def extract_text_from_pdf(self, pdf_path):
         try:
-            text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text
-            return text
+            return read_pdf(pdf_path, self.extraction_limits)
         except Exception as e:
-            print(f"Error reading PDF: {e}")
+            self._failure.reason = f"Error reading PDF: {e}"
+            print(self._failure.reason)
             return ""
     
     def extract_text_from_docx(self, docx_path):
         try:
-            doc = docx.Document(docx_path)
-            text = "\n".join([p.text for p in doc.paragraphs])
-            return text
+            return read_docx(docx_path, self.extraction_limits)
         except Exception as e:
-            print(f"Error reading DOCX: {e}")
+            self._failure.reason = f"Error reading DOCX: {e}"
+            print(self._failure.reason)
             return ""
     
     def extract_text_from_txt(self, txt_path):
         try:
-            with open(txt_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_txt(txt_path, self.extraction_limits)
+        except Exception as e:
+            self._failure.reason = f"Error reading TXT: {e}"
+            print(self._failure.reason)
+            return ""
+    
+    def extract_text_sandboxed(self, file_path):
+        try:
+            return extract_sandboxed(file_path, self.extraction_limits)
         except Exception as e:
-            print(f"Error reading TXT: {e}")
+            self._failure.reason = str(e)
+            print(f"Error extracting {Path(file_path).name}: {e}")
             return ""
     
     def extract_text(self, file_path):
         ext = Path(file_path).suffix.lower()
+        if self.sandbox and ext in ('.pdf', '.docx'):
+            return self.extract_text_sandboxed(file_path)
         if ext == '.pdf':
             return self.extract_text_from_pdf(file_path)
         elif ext == '.docx':
@@ -65,85 +224,213 @@ class ResumeScreener:
         elif ext == '.txt':
             return self.extract_text_from_txt(file_path)
         else:
+            self._failure.reason = f"Unsupported file type '{ext}'"
             return ""
     
     # ------------------ INFORMATION EXTRACTION ------------------ #
+    def scan_fields(self, text):
+        """Email, phone, experience and education of ``text``, lowercasing it once.
+
+        The last result is kept, so extract_email, extract_phone,
+        extract_experience and extract_education called on the same text
+        share one scan.
+        """
+        last_text, last_fields = self._last_scan
+        if last_text is text:
+            return last_fields
+
+        lower = text.lower()
+        email = self._email_pattern.search(text)
+        phone = self._phone_pattern.search(text)
+
+        stated_years = 0
+        ranges = []
+        sections = None
+        for match in self._number_pattern.finditer(lower):
+            start = match.start()
+            if match.group('end'):
+                if sections is None:
+                    sections = [(m.start(), bool(m.group('education')))
+                                for m in self._section_heading.finditer(lower)]
+                if not self._in_education(lower, start, sections):
+                    ranges.append((lower[start:start + 4], match.group('end')))
+            elif match.group('stated') or self._experience_label.search(lower, max(0, start - 40), start):
+                numbers = lower[start:match.end('years')].split('-')
+                stated_years = max(stated_years, *(int(number) for number in numbers))
+
+        degree, level = "Unknown", 0
+        for name, name_level, spellings, pattern, case_sensitive in self._degree_checks:
+            if not any(spelling in lower for spelling in spellings):
+                continue
+            if pattern.search(text if case_sensitive else lower):
+                degree, level = name.title(), name_level
+                break
+
+        fields = {
+            'email': email.group() if email else None,
+            'phone': phone.group() if phone else None,
+            'experience_years': max(stated_years, employment_years(ranges)),
+            'education_level': degree,
+            'education_score': level,
+        }
+        # One tuple, swapped in whole, so threads sharing the screener never
+        # see one text's fields paired with another text.
+        self._last_scan = (text, fields)
+        return fields
+
+    def _in_education(self, lower, start, sections):
+        line_start = lower.rfind('\n', 0, start) + 1
+        line_end = lower.find('\n', start)
+        if self._education_line.search(lower, line_start, line_end if line_end != -1 else len(lower)):
+            return True
+        heading = bisect.bisect(sections, (start, True)) - 1
+        return heading >= 0 and sections[heading][1]
+
     def extract_email(self, text):
-        matches = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b', text)
-        return matches[0] if matches else None
-    
+        return self.scan_fields(text)['email']
+
     def extract_phone(self, text):
-        matches = re.findall(r'[\+\(]?[0-9][0-9 .\-\(\)]{8,}[0-9]', text)
-        return matches[0] if matches else None
-    
+        return self.scan_fields(text)['phone']
+
     def extract_skills(self, text):
-        text_lower = text.lower()
+        found = set()
+        for match in self._skill_pattern.finditer(text.lower()):
+            found |= self._skill_implies[match.group()]
+
         found_skills = []
         skill_categories = {}
-        for cat, skills in self.skills_database.items():
-            cat_skills = []
-            for skill in skills:
-                if skill.lower() in text_lower:
-                    found_skills.append(skill)
-                    cat_skills.append(skill)
+        for cat, skills in self._skill_order:
+            cat_skills = [skill for skill, key in skills if key in found]
             if cat_skills:
+                found_skills.extend(cat_skills)
                 skill_categories[cat] = cat_skills
         return found_skills, skill_categories
     
     def extract_experience(self, text):
-        text_lower = text.lower()
-        patterns = [
-            r'(\d+)\+?\s*years?\s*(?:of)?\s*(?:experience|exp)',
-            r'experience\s*:\s*(\d+)\+?\s*years?',
-            r'(\d+)\s*-\s*(\d+)\s*years?\s*(?:of)?\s*(?:experience|exp)'
-        ]
-        max_exp = 0
-        for pat in patterns:
-            matches = re.findall(pat, text_lower)
-            for m in matches:
-                if isinstance(m, tuple):
-                    exp = max(int(x) for x in m if x.isdigit())
-                else:
-                    exp = int(m)
-                max_exp = max(max_exp, exp)
-        return max_exp
-    
+        return self.scan_fields(text)['experience_years']
+
     def extract_education(self, text):
-        text_lower = text.lower()
-        highest_level = 0
-        highest_degree = "Unknown"
-        for degree, level in self.education_levels.items():
-            if degree in text_lower and level > highest_level:
-                highest_level = level
-                highest_degree = degree.title()
-        return highest_degree, highest_level
-
-    # ------------------ MATCH SCORING WITHOUT SKLEARN ------------------ #
-    def calculate_match_score(self, resume_text, job_requirements, job_title=""):
-        # Simple keyword overlap
-        resume_words = set(resume_text.lower().split())
-        job_words = set((job_title + " " + job_requirements).lower().split())
-        if not job_words:
-            return 0
-        overlap = resume_words & job_words
-        score = (len(overlap) / len(job_words)) * 100
-        return round(score, 2)
-    
-    # ------------------ RESUME SCREENING ------------------ #
-    def screen_resume(self, resume_path, job_requirements, job_title=""):
+        fields = self.scan_fields(text)
+        return fields['education_level'], fields['education_score']
+
+    # ------------------ FEATURE EXTRACTION (CACHED) ------------------ #
+    def extract_features(self, resume_path):
+        """Text plus every per-resume feature, from the cache when possible."""
+        digest = None
+        if self.cache is not None:
+            try:
+                digest = file_digest(resume_path)
+            except OSError:
+                return None
+            cached = self.cache.get(digest)
+            if cached is not None:
+                return None if 'failure' in cached else cached
+
+        # The extract_text_* methods leave the reason for an empty result here.
+        self._failure.reason = None
         text = self.extract_text(resume_path)
         if not text:
+            if digest is not None:
+                self.cache.put_failure(digest, self._failure.reason or "No text could be extracted")
+            return None
+
+        features = self.text_features(text)
+        if digest is not None:
+            self.cache.put(digest, features)
+        return features
+
+    def text_features(self, text):
+        """Every per-resume feature of already extracted text."""
+        skills, skill_cats = self.extract_skills(text)
+        fields = self.scan_fields(text)
+        return {
+            'text': text,
+            'email': fields['email'],
+            'phone': fields['phone'],
+            'skills': skills,
+            'skill_categories': skill_cats,
+            'experience_years': fields['experience_years'],
+            'education_level': fields['education_level'],
+            'education_score': fields['education_score'],
+        }
+
+    # ------------------ JOB PROFILES ------------------ #
+    def job_profile(self, job_requirements, job_title=""):
+        """The JobProfile of a job; accepts an existing profile unchanged."""
+        if isinstance(job_requirements, JobProfile):
+            return job_requirements
+        profile = self.cached_profile(job_requirements, job_title)
+        if profile is not None:
+            return profile
+
+        required_skills, _ = self.extract_skills(job_requirements)
+        profile = JobProfile(job_title, job_requirements, required_skills,
+                             self.job_query(job_requirements, job_title),
+                             profile_fingerprint(job_title, job_requirements, self.feature_version))
+        self.remember_profile(profile)
+        return profile
+
+    def cached_profile(self, job_requirements, job_title=""):
+        key = (job_title, job_requirements)
+        with self._profiles_lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self._profiles.move_to_end(key)
+            return profile
+
+    def remember_profile(self, profile):
+        key = (profile.job_title, profile.job_requirements)
+        with self._profiles_lock:
+            self._profiles[key] = profile
+            self._profiles.move_to_end(key)
+            while len(self._profiles) > self.profile_cache_size:
+                self._profiles.popitem(last=False)
+
+    # ------------------ MATCH SCORING (BM25) ------------------ #
+    def job_query(self, job_requirements, job_title=""):
+        return tokenize(job_title + " " + job_requirements)
+
+    def calculate_match_score(self, resume_text, job_requirements, job_title="", stats=None):
+        score = self.rank_resumes([resume_text], job_requirements, job_title, stats)[0]
+        return round(float(score), 2)
+
+    def rank_resumes(self, resume_texts, job_requirements, job_title="", stats=None):
+        """BM25 match scores (0-100) of many resumes for one job, in one pass.
+
+        ``job_requirements`` may be a JobProfile. ``stats`` is the job's
+        CorpusStats; when omitted, IDF and average length come from
+        ``resume_texts`` themselves if there are several.
+        """
+        scorer = self.job_profile(job_requirements, job_title).scorer
+        docs = [tokenize(text) for text in resume_texts]
+        if stats is None and len(docs) > 1:
+            stats = CorpusStats.from_documents(docs, scorer.vocabulary)
+        return scorer.score(docs, stats)
+    
+    # ------------------ RESUME SCREENING ------------------ #
+    def screen_resume(self, resume_path, job_requirements, job_title="", stats=None):
+        features = self.extract_features(resume_path)
+        return self.screen_features(features, job_requirements, job_title, stats)
+
+    def screen_features(self, features, job_requirements, job_title="", stats=None, match_score=None):
+        if not features:
             return {'error': 'Could not extract text', 'match_score': 0}
         
-        email = self.extract_email(text)
-        phone = self.extract_phone(text)
-        skills, skill_cats = self.extract_skills(text)
-        experience = self.extract_experience(text)
-        education, edu_score = self.extract_education(text)
+        profile = self.job_profile(job_requirements, job_title)
+        weights = profile.weights
+        text = features['text']
+        email = features['email']
+        phone = features['phone']
+        skills = features['skills']
+        skill_cats = features['skill_categories']
+        experience = features['experience_years']
+        education = features['education_level']
+        edu_score = features['education_score']
         
-        match_score = self.calculate_match_score(text, job_requirements, job_title)
+        if match_score is None:
+            match_score = self.calculate_match_score(text, profile, stats=stats)
         
-        required_skills, _ = self.extract_skills(job_requirements)
+        required_skills = profile.required_skills
         if required_skills:
             matched_skills = set(skills) & set(required_skills)
             skill_match_pct = (len(matched_skills) / len(required_skills)) * 100
@@ -152,11 +439,11 @@ class ResumeScreener:
             skill_match_pct = 50
         
         # Adjust score
-        final_score = match_score + skill_match_pct * 0.2
-        if experience >= 3: final_score += 5
-        if experience >= 5: final_score += 5
-        if edu_score >= 3: final_score += 5
-        if edu_score >= 4: final_score += 5
+        final_score = match_score + skill_match_pct * weights['skill_match']
+        for years, bonus in weights['experience_bonus'].items():
+            if experience >= years: final_score += bonus
+        for level, bonus in weights['education_bonus'].items():
+            if edu_score >= level: final_score += bonus
         final_score = min(final_score, 100)
         
         # Recommendation
@@ -179,9 +466,25 @@ class ResumeScreener:
             'education_score': edu_score,
             'recommendation': rec,
             'resume_text_length': len(text),
-            'extracted_successfully': True
+            'extracted_successfully': True,
+            'scoring_version': self.scoring_version,
+            'profile_fingerprint': profile.fingerprint,
         }
 
+    def screen_batch(self, features_list, job_requirements, job_title="", stats=None):
+        """Screen already-extracted resumes, scoring all texts with one BM25 product."""
+        job_requirements = self.job_profile(job_requirements, job_title)
+        present = [f for f in features_list if f]
+        scores = iter(self.rank_resumes([f['text'] for f in present], job_requirements, job_title, stats))
+        results = []
+        for features in features_list:
+            if features:
+                results.append(self.screen_features(features, job_requirements, job_title,
+                                                    match_score=round(float(next(scores)), 2)))
+            else:
+                results.append(self.screen_features(None, job_requirements, job_title))
+        return results
+
 # ------------------ TEST ------------------ #
 if __name__ == "__main__":
     screener = ResumeScreener()
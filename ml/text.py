@@ -0,0 +1,35 @@
+import math
+import re
+from collections import Counter
+
+# Keeps symbols that belong to tech terms: 'c++', 'c#', 'node.js', 'ci/cd'.
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset('''
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each etc few for from further
+had has have having he her here hers herself him himself his how i if in into is it its itself
+just me more most my myself no nor not now of off on once only or other our ours ourselves out
+over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours yourself yourselves
+'''.split())
+
+
+def tokenize(text):
+    """Lowercased word tokens of ``text`` without stopwords."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def term_weights(tokens, boost=None):
+    """L2-normalised log term frequencies, optionally boosting some terms."""
+    weights = {}
+    for term, count in Counter(tokens).items():
+        weight = 1 + math.log(count)
+        if boost and term in boost:
+            weight *= boost[term]
+        weights[term] = weight
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    if not norm:
+        return {}
+    return {term: w / norm for term, w in weights.items()}
@@ -0,0 +1,43 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row on a page, serialised into an opaque
+URL-safe token. The next page is fetched with a row-value comparison against
+it, which SQLite answers straight from the matching index no matter how deep
+the page is, unlike OFFSET.
+"""
+
+import base64
+import json
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, arity):
+    """The sort key inside ``token``, or None for a missing or malformed one."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != arity:
+        return None
+    # Only values SQLite can bind; a bool or null is never a sort key here.
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        return None
+    return tuple(values)
+
+
+def split_page(rows, page_size, key):
+    """Trim ``page_size + 1`` fetched rows to a page plus the next cursor."""
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(key(rows[-1]))
+    return rows, None
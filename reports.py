@@ -0,0 +1,75 @@
+"""
+AI screening report PDFs.
+
+Reports are rendered into memory and kept in a small LRU keyed by a hash of
+the application's ``screening_result``, which doubles as the HTTP ETag: a
+repeat download is answered with 304, or from the cache, without drawing the
+PDF again, and a re-screened application gets a new key automatically.
+"""
+
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+# Bump when the report layout changes so stale cached PDFs are not served.
+REPORT_VERSION = 1
+
+
+def report_etag(screening_result):
+    return hashlib.sha256(f"{REPORT_VERSION}:{screening_result}".encode('utf-8')).hexdigest()[:32]
+
+
+def render_report(screening_result):
+    # reportlab is only needed once a report is actually drawn.
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    result = json.loads(screening_result)
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.drawString(50, 750, f"Match Score: {result.get('match_score', 0)}%")
+    c.drawString(50, 720, f"Recommendation: {result.get('recommendation', result.get('error', 'N/A'))}")
+    c.drawString(50, 690, f"Experience: {result.get('experience_years', 0)} years")
+    c.drawString(50, 660, f"Education: {result.get('education_level', 'Unknown')}")
+    c.drawString(50, 630, f"Skills Matched: {', '.join(result.get('skills_matched', []))}")
+    c.save()
+    return buffer.getvalue()
+
+
+class ReportCache:
+    """Thread-safe LRU of rendered PDFs, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+            return pdf
+
+    def put(self, key, pdf):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = pdf
+            self._size += len(pdf)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def report(self, screening_result):
+        """The PDF for ``screening_result``, rendering only on a cache miss."""
+        key = report_etag(screening_result)
+        pdf = self.get(key)
+        if pdf is None:
+            pdf = render_report(screening_result)
+            self.put(key, pdf)
+        return pdf
@@ -0,0 +1,267 @@
+"""
+Versioned scoring and incremental re-scoring.
+
+Every screened application records the screener's ``scoring_version``
+(SCORING_VERSION plus the extractor version and a hash of the skill and
+education taxonomy) and the fingerprint of the job profile it was scored
+against. Editing a job's title or requirements changes the fingerprint;
+changing the scorer or the taxonomy changes the version. Either way the
+affected applications are stale and rescore_job brings them up to date.
+
+Scores also depend on the job's corpus statistics (see corpus.py). Those are
+a snapshot, rebuilt by rescore_job; when the rebuilt snapshot differs from
+the stored one, every application of the job is re-scored against it, not
+just the stale ones. Applications scored on arrival use the snapshot as it
+is, and rerank_outgrown_jobs queues a job for re-ranking once it has grown
+by RERANK_GROWTH since its snapshot, so all of a job's scores stay
+comparable.
+
+Re-scoring never opens a resume file. After a job edit the features stored
+in each screening_result are reused as they are; after a version change they
+are re-derived from the text kept in the candidate search index (resume_fts).
+The job's corpus statistics are rebuilt from the same texts first, since a
+new vocabulary needs new document frequencies; that pass also reduces each
+resume to its term frequencies over the job vocabulary, so every batch is
+then ranked with one BM25 matrix product without tokenizing again.
+Application statuses are left alone; only scores and screening results
+change.
+"""
+
+import itertools
+import json
+import time
+
+import numpy as np
+
+from corpus import load_job_stats, replace_job_stats
+from matching import get_job_profile
+from ml.scoring import CorpusStats
+from ml.text import tokenize
+from search import restore_symbols
+from tasks import store_screening
+
+RESCORE_BATCH_SIZE = 500
+# Re-rank a job once its indexed resumes outnumber its statistics snapshot by
+# this fraction (and by at least one), so re-ranking costs stay amortized.
+RERANK_GROWTH = 0.1
+
+
+def create_rescoring_tables(cursor):
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(applications)')]
+    if 'scoring_version' not in columns:
+        cursor.execute('ALTER TABLE applications ADD COLUMN scoring_version TEXT')
+    if 'profile_fingerprint' not in columns:
+        cursor.execute('ALTER TABLE applications ADD COLUMN profile_fingerprint TEXT')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rescore_queue (
+            job_id INTEGER PRIMARY KEY,
+            enqueued_at REAL NOT NULL,
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        )
+    ''')
+
+
+def enqueue_rescore(conn, job_id):
+    """Ask the worker to re-score a job. The caller commits."""
+    conn.execute('''
+        INSERT INTO rescore_queue (job_id, enqueued_at) VALUES (?, ?)
+        ON CONFLICT (job_id) DO UPDATE SET enqueued_at = excluded.enqueued_at
+    ''', (job_id, time.time()))
+
+
+def stale_jobs(conn, screener):
+    """Jobs with applications scored by another scoring version."""
+    return [row[0] for row in conn.execute('''
+        SELECT DISTINCT job_id FROM applications
+        WHERE status IS NOT 'screening' AND scoring_version IS NOT ?
+    ''', (screener.scoring_version,))]
+
+
+def outgrown_jobs(conn, job_ids=None):
+    """Jobs (of ``job_ids``, default all) whose resumes outgrew their statistics snapshot."""
+    job_filter, params = '', ()
+    if job_ids is not None:
+        if not job_ids:
+            return []
+        job_filter = f"WHERE a.job_id IN ({','.join('?' * len(job_ids))})"
+        params = tuple(job_ids)
+    return [row[0] for row in conn.execute(f'''
+        SELECT a.job_id FROM applications a
+        JOIN resume_fts f ON f.rowid = a.id
+        LEFT JOIN job_corpus c ON c.job_id = a.job_id
+        {job_filter}
+        GROUP BY a.job_id
+        HAVING COUNT(*) - COALESCE(MAX(c.doc_count), 0) >= MAX(1, COALESCE(MAX(c.doc_count), 0) * ?)
+    ''', (*params, RERANK_GROWTH))]
+
+
+def _same_stats(a, b):
+    def key(stats):
+        return stats.doc_count, stats.total_length, {term: df for term, df in stats.df.items() if df}
+    return key(a) == key(b)
+
+
+def _stale_batches(conn, job_id, scoring_version, fingerprint, batch_size):
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT a.id, a.resume_path, a.scoring_version, a.screening_result, f.text FROM applications a
+            LEFT JOIN resume_fts f ON f.rowid = a.id
+            WHERE a.job_id = ? AND a.id > ? AND a.status IS NOT 'screening'
+              AND (a.scoring_version IS NOT ? OR a.profile_fingerprint IS NOT ?)
+            ORDER BY a.id LIMIT ?
+        ''', (job_id, last_id, scoring_version, fingerprint, batch_size)).fetchall()
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]['id']
+
+
+def _job_texts(conn, job_id, batch_size):
+    # (application id, text) of every indexed application of the job.
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT a.id, f.text FROM applications a JOIN resume_fts f ON f.rowid = a.id
+            WHERE a.job_id = ? AND a.id > ? ORDER BY a.id LIMIT ?
+        ''', (job_id, last_id, batch_size)).fetchall()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]['id']
+
+
+def stored_features(screening_result, text):
+    """The features a current-version screening result was computed from, or None."""
+    result = json.loads(screening_result) if screening_result else {}
+    if 'all_skills' not in result:
+        return None
+    return {
+        'text': text,
+        'email': result['email'],
+        'phone': result['phone'],
+        'skills': result['all_skills'],
+        'skill_categories': result['skill_categories'],
+        'experience_years': result['experience_years'],
+        'education_level': result['education_level'],
+        'education_score': result['education_score'],
+    }
+
+
+def _screen(screener, profile, stats, rows, features_list, term_rows):
+    """screen_batch, ranking from the precomputed term frequencies where there are any."""
+    indexed = [row['id'] for row, features in zip(rows, features_list) if features and row['id'] in term_rows]
+    scores = {}
+    if indexed:
+        tf = np.array([term_rows[app_id][0] for app_id in indexed])
+        lengths = np.array([term_rows[app_id][1] for app_id in indexed])
+        scores = dict(zip(indexed, profile.scorer.score_matrix(tf, lengths, stats)))
+    # Resumes read from file instead are scored from their text.
+    return [screener.screen_features(features, profile, stats=stats,
+                                     match_score=round(float(scores[row['id']]), 2) if row['id'] in scores else None)
+            for row, features in zip(rows, features_list)]
+
+
+def rescore_job(conn, screener, job_id, batch_size=RESCORE_BATCH_SIZE):
+    """Re-score the stale applications of one job; returns how many were updated.
+
+    Every application counts as stale when the rebuilt corpus statistics
+    differ from the stored snapshot. Commits once per batch, so an
+    interrupted run resumes where it stopped.
+    """
+    job = conn.execute('SELECT id, title, requirements FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    if job is None:
+        return 0
+    profile = get_job_profile(conn, screener, job)
+    scoring_version = screener.scoring_version
+
+    scorer = profile.scorer
+    stats = CorpusStats()
+    term_rows = {}
+    for app_id, text in _job_texts(conn, job_id, batch_size):
+        tokens = tokenize(restore_symbols(text))
+        stats.add(tokens, scorer.vocabulary)
+        tf, lengths = scorer.term_matrix([tokens])
+        term_rows[app_id] = (tf[0], lengths[0])
+    if not _same_stats(stats, load_job_stats(conn, job_id)):
+        # Clearing the fingerprints with the same commit keeps every
+        # application stale until it is re-scored, even across a restart.
+        replace_job_stats(conn, job_id, stats)
+        conn.execute('UPDATE applications SET profile_fingerprint = NULL WHERE job_id = ?', (job_id,))
+        conn.commit()
+
+    batches = _stale_batches(conn, job_id, scoring_version, profile.fingerprint, batch_size)
+    first = next(batches, None)
+    if first is None:
+        conn.commit()
+        return 0
+
+    updated = 0
+    for rows in itertools.chain([first], batches):
+        features_list, changed = [], []
+        for row in rows:
+            features = None
+            text = restore_symbols(row['text'])
+            if text is None:
+                # Screened before the search index existed: the feature cache
+                # (or, without one, a parse) is the only source of its text.
+                features = screener.extract_features(row['resume_path'])
+            elif row['scoring_version'] == scoring_version:
+                features = stored_features(row['screening_result'], text)
+            features_changed = features is None and text is not None
+            if features_changed:
+                features = screener.text_features(text)
+            features_list.append(features)
+            changed.append(features_changed or text is None)
+        results = _screen(screener, profile, stats, rows, features_list, term_rows)
+        for row, features, result, reindex in zip(rows, features_list, results, changed):
+            # Re-derived features also refresh the skills and education
+            # columns of the search index.
+            store_screening(conn, row['id'], result, features if reindex else None)
+        # Stamped here rather than from the results, so resumes without any
+        # text are not retried on every run.
+        conn.executemany(
+            'UPDATE applications SET scoring_version = ?, profile_fingerprint = ? WHERE id = ?',
+            [(scoring_version, profile.fingerprint, row['id']) for row in rows]
+        )
+        conn.commit()
+        updated += len(rows)
+    return updated
+
+
+def rescore_all(conn, screener, job_ids=None, batch_size=RESCORE_BATCH_SIZE):
+    """Re-score ``job_ids`` (default: every job with stale scores); returns the count."""
+    if job_ids is None:
+        job_ids = stale_jobs(conn, screener)
+    return sum(rescore_job(conn, screener, job_id, batch_size) for job_id in job_ids)
+
+
+def rerank_outgrown_jobs(conn, job_ids=None):
+    """Queue the jobs that outgrew their statistics for re-ranking; returns them.
+
+    The caller commits.
+    """
+    jobs = outgrown_jobs(conn, job_ids)
+    for job_id in jobs:
+        enqueue_rescore(conn, job_id)
+    return jobs
+
+
+def rescore_queued_jobs(conn, screener, job_ids=None):
+    """Re-score the jobs (of ``job_ids``, default all) in rescore_queue; returns how many were handled."""
+    job_filter, params = '', ()
+    if job_ids is not None:
+        if not job_ids:
+            return 0
+        job_filter = f"WHERE job_id IN ({','.join('?' * len(job_ids))})"
+        params = tuple(job_ids)
+    queued = conn.execute(f'SELECT job_id, enqueued_at FROM rescore_queue {job_filter} ORDER BY enqueued_at',
+                          params).fetchall()
+    for job_id, enqueued_at in queued:
+        rescore_job(conn, screener, job_id)
+        # A job edited again meanwhile was re-enqueued and stays queued.
+        conn.execute('DELETE FROM rescore_queue WHERE job_id = ? AND enqueued_at = ?', (job_id, enqueued_at))
+        conn.commit()
+    return len(queued)
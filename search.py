@@ -0,0 +1,336 @@
+"""
+Full-text search on SQLite FTS5, for jobs and for candidates.
+
+``jobs_fts`` is an external-content index over the jobs table (title,
+description, requirements and location), kept in sync by triggers so every
+write path updates it, create_job included. Keyword searches are ranked with
+bm25, weighting title matches highest; location is indexed for filtering only
+and does not affect the rank. Results page with keyset cursors, like the
+other lists.
+
+``resume_fts`` holds the extracted text of every screened resume, with the
+detected skills and education level as extra columns, keyed by application
+id. Screening fills it in as it goes (see tasks.store_screening), so
+recruiters can search all their applicants without a resume being parsed
+again; ``flask index-resumes`` catches up applications screened before the
+index existed. Recruiter queries may use AND, OR, NOT, parentheses, "quoted
+phrases", prefix* terms and skills:/education: column filters; anything else
+is quoted, so user input can never be an FTS5 syntax error.
+"""
+
+import re
+
+from markupsafe import Markup, escape
+
+from pagination import split_page
+
+JOB_TYPES = ('Full-time', 'Part-time', 'Contract', 'Internship')
+EXPERIENCE_LEVELS = ('Entry-level', 'Mid-level', 'Senior', 'Lead')
+
+# bm25 column weights: title, description, requirements, location.
+RANK = 'bm25(jobs_fts, 10.0, 1.0, 4.0, 0.0)'
+
+
+def create_job_search(cursor):
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+            title, description, requirements, location,
+            content='jobs', content_rowid='id', tokenize='porter unicode61'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+            INSERT INTO jobs_fts (rowid, title, description, requirements, location)
+            VALUES (NEW.id, NEW.title, NEW.description, NEW.requirements, NEW.location);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, title, description, requirements, location)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.requirements, OLD.location);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS jobs_fts_update
+        AFTER UPDATE OF title, description, requirements, location ON jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, title, description, requirements, location)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.requirements, OLD.location);
+            INSERT INTO jobs_fts (rowid, title, description, requirements, location)
+            VALUES (NEW.id, NEW.title, NEW.description, NEW.requirements, NEW.location);
+        END
+    ''')
+    cursor.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+    # Filtered browsing without keywords walks these in posting order.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_type
+        ON jobs (status, job_type, created_at DESC, id DESC)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_experience
+        ON jobs (status, experience_level, created_at DESC, id DESC)
+    ''')
+
+
+def fts_terms(text):
+    """Quote each word of user input so FTS5 never sees its query syntax."""
+    return ['"' + word + '"' for word in re.findall(r'\w+', text or '')]
+
+
+def match_expression(keywords, location=None):
+    """The MATCH string for the given keywords and location, or None."""
+    parts = []
+    terms = fts_terms(keywords)
+    if terms:
+        # Prefix-match the last word so partial input still finds jobs.
+        terms[-1] += '*'
+        parts.append('{title description requirements} : (' + ' '.join(terms) + ')')
+    places = fts_terms(location)
+    if places:
+        parts.append('location : (' + ' '.join(places) + ')')
+    return ' AND '.join(parts) or None
+
+
+def search_jobs(conn, keywords='', location='', job_type='', experience_level='', after=None, page_size=20):
+    """One page of active jobs and the cursor for the next.
+
+    With keywords the page is ordered by relevance, otherwise newest first;
+    ``after`` is the decoded cursor of the previous page for that order.
+    """
+    filters, params = ["j.status = 'active'"], []
+    if job_type:
+        filters.append('j.job_type = ?')
+        params.append(job_type)
+    if experience_level:
+        filters.append('j.experience_level = ?')
+        params.append(experience_level)
+
+    match = match_expression(keywords, location)
+    columns = '''j.*, (SELECT COALESCE(SUM(count), 0) FROM job_status_counts c
+                       WHERE c.job_id = j.id) AS application_count'''
+
+    if fts_terms(keywords):
+        if after:
+            filters.append('(s.score, s.id) > (?, ?)')
+            params.extend(after)
+        rows = conn.execute(f'''
+            SELECT {columns}, s.score FROM (
+                SELECT rowid AS id, {RANK} AS score FROM jobs_fts WHERE jobs_fts MATCH ?
+            ) s JOIN jobs j ON j.id = s.id
+            WHERE {' AND '.join(filters)}
+            ORDER BY s.score, s.id LIMIT ?
+        ''', (match, *params, page_size + 1)).fetchall()
+        return split_page(rows, page_size, lambda j: (j['score'], j['id']))
+
+    if match:
+        filters.append('j.id IN (SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ?)')
+        params.append(match)
+    if after:
+        filters.append('(j.created_at, j.id) < (?, ?)')
+        params.extend(after)
+    rows = conn.execute(f'''
+        SELECT {columns} FROM jobs j
+        WHERE {' AND '.join(filters)}
+        ORDER BY j.created_at DESC, j.id DESC LIMIT ?
+    ''', (*params, page_size + 1)).fetchall()
+    return split_page(rows, page_size, lambda j: (j['created_at'], j['id']))
+
+
+# ==================== CANDIDATE SEARCH ====================
+
+# bm25 column weights: text, skills, education.
+CANDIDATE_RANK = 'bm25(resume_fts, 1.0, 5.0, 2.0)'
+CANDIDATE_COLUMNS = ('text', 'skills', 'education')
+SNIPPET_TOKENS = 16
+INDEX_BATCH_SIZE = 100
+
+_OPERATORS = ('AND', 'OR', 'NOT')
+_QUERY_TOKEN = re.compile(r'(?:(\w+):)?(?:"([^"]*)"?|([\w.+#]+)(\*)?)|([()])')
+
+# The unicode61 tokenizer drops '+', '#' and '.', which would leave C++, C#
+# and F# as a bare "c" or "f" and .NET as "net". Indexed text and queries
+# both spell them as single tokens instead, joined by a private-use
+# character the tokenizer keeps in a token but no resume contains, so
+# restore_symbols can give back the original text exactly.
+_MARK = '\ue000'
+_SYMBOL = re.compile(r'(?<![\w+#.@-])(?:([cC])\+\+|([cCfF])#|\.([nN][eE][tT]))(?![\w+#@])')
+_SPELLED_SYMBOL = re.compile(f'([cC]){_MARK}plusplus|([cCfF]){_MARK}sharp|{_MARK}dot([nN][eE][tT])')
+_TERM_WORD = re.compile(r'[\w' + _MARK + ']+')
+
+
+def spell_symbols(text):
+    """``text`` with C++, C#, F# and .NET spelled as single tokens."""
+    def spell(match):
+        plus, sharp, net = match.groups()
+        return plus + _MARK + 'plusplus' if plus else sharp + _MARK + 'sharp' if sharp else _MARK + 'dot' + net
+    return _SYMBOL.sub(spell, text)
+
+
+def restore_symbols(text):
+    """The original of text stored by index_resume (None stays None)."""
+    def restore(match):
+        plus, sharp, net = match.groups()
+        return plus + '++' if plus else sharp + '#' if sharp else '.' + net
+    return text if text is None else _SPELLED_SYMBOL.sub(restore, text)
+
+
+def create_resume_search(cursor):
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS resume_fts USING fts5(
+            text, skills, education, tokenize='porter unicode61'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS resume_fts_delete AFTER DELETE ON applications BEGIN
+            DELETE FROM resume_fts WHERE rowid = OLD.id;
+        END
+    ''')
+
+
+def spell_resume_symbols(cursor):
+    """Respell C++, C#, F# and .NET in resumes indexed before spell_symbols."""
+    last_id = 0
+    while True:
+        rows = cursor.execute('SELECT rowid, text, skills FROM resume_fts WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                              (last_id, INDEX_BATCH_SIZE)).fetchall()
+        for rowid, text, skills in rows:
+            spelled = (spell_symbols(text), spell_symbols(skills))
+            if spelled != (text, skills):
+                cursor.execute('UPDATE resume_fts SET text = ?, skills = ? WHERE rowid = ?', (*spelled, rowid))
+        if len(rows) < INDEX_BATCH_SIZE:
+            return
+        last_id = rows[-1][0]
+
+
+def index_resume(conn, app_id, features):
+    """(Re)index the extracted features of one application. The caller commits.
+
+    Symbols are spelled out (see spell_symbols); read the text back through
+    restore_symbols.
+    """
+    conn.execute('DELETE FROM resume_fts WHERE rowid = ?', (app_id,))
+    conn.execute('INSERT INTO resume_fts (rowid, text, skills, education) VALUES (?, ?, ?, ?)',
+                 (app_id, spell_symbols(features['text']), spell_symbols(', '.join(features['skills'])),
+                  features['education_level']))
+
+
+def index_missing_resumes(conn, screener, batch_size=INDEX_BATCH_SIZE):
+    """Index screened applications that are not in resume_fts yet; returns how many were added."""
+    indexed, last_id = 0, 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, resume_path FROM applications
+            WHERE id > ? AND status IS NOT 'screening'
+              AND id NOT IN (SELECT rowid FROM resume_fts)
+            ORDER BY id LIMIT ?
+        ''', (last_id, batch_size)).fetchall()
+        for row in rows:
+            features = screener.extract_features(row['resume_path'])
+            if features:
+                index_resume(conn, row['id'], features)
+                indexed += 1
+        conn.commit()
+        if len(rows) < batch_size:
+            return indexed
+        last_id = rows[-1]['id']
+
+
+def candidate_expression(query):
+    """Translate a recruiter's query into a valid FTS5 expression, or None.
+
+    Operators that cannot apply (leading, doubled, trailing) and unmatched
+    parentheses are dropped rather than reported. A NOT with nothing to
+    subtract from is dropped together with its operand, so a query that
+    only excludes matches nothing instead of what it meant to exclude.
+    """
+    out, depth = [], 0
+    # Set by a dangling NOT: the nesting depth within the operand being dropped.
+    skipping = None
+
+    def add_operand(token):
+        if out and out[-1] not in _OPERATORS and out[-1] != '(':
+            out.append('AND')
+        out.append(token)
+
+    for column, phrase, word, star, paren in _QUERY_TOKEN.findall(query or ''):
+        if skipping is not None:
+            if paren == ')' and not skipping:
+                skipping = None  # nothing left to drop; the group closes below
+            else:
+                if paren:
+                    skipping += 1 if paren == '(' else -1
+                elif (word in _OPERATORS and not column) or not re.search(r'\w', phrase or word):
+                    continue
+                if not skipping:
+                    skipping = None
+                continue
+        if paren == '(':
+            add_operand('(')
+            depth += 1
+        elif paren == ')':
+            while depth and out[-1] in _OPERATORS:
+                out.pop()
+            if depth and out[-1] != '(':
+                out.append(')')
+                depth -= 1
+        elif word in _OPERATORS and not column:
+            if word == 'NOT' and out and out[-1] == 'AND':
+                out[-1] = 'NOT'  # "a AND NOT b" is FTS5's "a NOT b"
+            elif out and out[-1] not in _OPERATORS and out[-1] != '(':
+                out.append(word)
+            elif word == 'NOT':
+                skipping = 0
+        else:
+            words = _TERM_WORD.findall(spell_symbols(phrase if phrase else word))
+            if not words:
+                continue
+            term = '"' + ' '.join(words) + '"' + ('*' if star else '')
+            if column.lower() in CANDIDATE_COLUMNS:
+                term = column.lower() + ' : ' + term
+            add_operand(term)
+
+    while out and (out[-1] in _OPERATORS or out[-1] == '('):
+        if out.pop() == '(':
+            depth -= 1
+    return ' '.join(out + [')'] * depth) or None
+
+
+def search_candidates(conn, recruiter_id, query, job_id=None, after=None, page_size=20):
+    """One page of the recruiter's applicants matching ``query``, best first."""
+    match = candidate_expression(query)
+    if match is None:
+        return [], None
+
+    filters, params = ['j.posted_by = ?'], [recruiter_id]
+    if job_id is not None:
+        filters.append('a.job_id = ?')
+        params.append(job_id)
+    if after:
+        filters.append('(s.score, s.id) > (?, ?)')
+        params.extend(after)
+    rows = conn.execute(f'''
+        SELECT a.id, a.job_id, a.status, a.match_score, a.applied_at, s.score,
+               j.title AS job_title, u.full_name AS candidate_name, u.email AS candidate_email
+        FROM (SELECT rowid AS id, {CANDIDATE_RANK} AS score FROM resume_fts WHERE resume_fts MATCH ?) s
+        JOIN applications a ON a.id = s.id
+        JOIN jobs j ON a.job_id = j.id
+        JOIN users u ON a.user_id = u.id
+        WHERE {' AND '.join(filters)}
+        ORDER BY s.score, s.id LIMIT ?
+    ''', (match, *params, page_size + 1)).fetchall()
+    rows, next_cursor = split_page(rows, page_size, lambda a: (a['score'], a['id']))
+
+    # Snippets only for the rows on this page.
+    snippets = {}
+    if rows:
+        snippets = dict(conn.execute(f'''
+            SELECT rowid, snippet(resume_fts, 0, char(2), char(3), '…', {SNIPPET_TOKENS})
+            FROM resume_fts WHERE resume_fts MATCH ? AND rowid IN ({','.join('?' * len(rows))})
+        ''', (match, *(row['id'] for row in rows))).fetchall())
+    candidates = [dict(row, snippet=highlight(snippets.get(row['id'], ''))) for row in rows]
+    return candidates, next_cursor
+
+
+def highlight(snippet):
+    """HTML for an FTS5 snippet whose matches are delimited by \\x02 and \\x03."""
+    return Markup(str(escape(restore_symbols(snippet))).replace('\x02', '<mark>').replace('\x03', '</mark>'))
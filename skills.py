@@ -0,0 +1,145 @@
+"""
+Normalized skills of applications and jobs.
+
+``application_skills`` holds one row per skill detected in an application's
+resume, with its taxonomy category and whether the job asked for it;
+``job_skills`` holds the skills each job requires. Both are written when the
+data is produced (screening, posting a job), so filtering candidates by skill
+and measuring a job's skill coverage are indexed joins, and the applications
+page lists matched skills without decoding each row's screening_result.
+"""
+
+SKILL_COVERAGE_LIMIT = 50
+
+
+def create_skill_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS application_skills (
+            application_id INTEGER NOT NULL,
+            skill TEXT NOT NULL,
+            category TEXT NOT NULL,
+            matched INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (application_id, skill),
+            FOREIGN KEY (application_id) REFERENCES applications (id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_application_skills_skill
+        ON application_skills (skill, application_id)
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_skills (
+            job_id INTEGER NOT NULL,
+            skill TEXT NOT NULL,
+            category TEXT NOT NULL,
+            PRIMARY KEY (job_id, skill),
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS application_skills_delete AFTER DELETE ON applications BEGIN
+            DELETE FROM application_skills WHERE application_id = OLD.id;
+        END
+    ''')
+
+    # Seed from the screening results already on file; job_skills needs the
+    # skill taxonomy and is filled in by index_missing_job_skills.
+    cursor.execute('''
+        INSERT OR IGNORE INTO application_skills (application_id, skill, category, matched)
+        SELECT a.id, s.value, c.key,
+               s.value IN (SELECT value FROM json_each(a.screening_result, '$.skills_matched'))
+        FROM applications a,
+             json_each(a.screening_result, '$.skill_categories') c,
+             json_each(c.value) s
+        WHERE json_valid(a.screening_result)
+    ''')
+
+
+def categorized(skill_categories):
+    """(skill, category) pairs of a ``{category: [skills]}`` map, each skill once.
+
+    A skill listed under several categories ('swift', 'kotlin') keeps the
+    first, in taxonomy order.
+    """
+    pairs = {}
+    for category, skills in skill_categories.items():
+        for skill in skills:
+            pairs.setdefault(skill, category)
+    return list(pairs.items())
+
+
+def store_application_skills(conn, app_id, result):
+    """Replace an application's skill rows from its screening result. The caller commits."""
+    conn.execute('DELETE FROM application_skills WHERE application_id = ?', (app_id,))
+    matched = set(result.get('skills_matched', []))
+    conn.executemany(
+        'INSERT INTO application_skills (application_id, skill, category, matched) VALUES (?, ?, ?, ?)',
+        [(app_id, skill, category, skill in matched)
+         for skill, category in categorized(result.get('skill_categories', {}))]
+    )
+
+
+def store_job_skills(conn, screener, job_id, requirements):
+    """Replace a job's required skills. The caller commits."""
+    _, skill_categories = screener.extract_skills(requirements or '')
+    conn.execute('DELETE FROM job_skills WHERE job_id = ?', (job_id,))
+    conn.executemany('INSERT INTO job_skills (job_id, skill, category) VALUES (?, ?, ?)',
+                     [(job_id, skill, category) for skill, category in categorized(skill_categories)])
+
+
+def index_missing_job_skills(conn, screener):
+    """Fill in job_skills for jobs that have none yet."""
+    jobs = conn.execute('''
+        SELECT id, requirements FROM jobs
+        WHERE id NOT IN (SELECT job_id FROM job_skills)
+    ''').fetchall()
+    for job in jobs:
+        store_job_skills(conn, screener, job['id'], job['requirements'])
+    return len(jobs)
+
+
+# ==================== QUERIES ====================
+
+def has_skills_filter(skills, column='a.id'):
+    """SQL condition (and params) for applications having every one of ``skills``.
+
+    One primary-key probe per skill and candidate row, so a filtered page
+    costs time in the rows of its own job, not in every application.
+    """
+    skills = sorted({skill.strip().lower() for skill in skills if skill.strip()})
+    if not skills:
+        return '1', ()
+    exists = f'EXISTS (SELECT 1 FROM application_skills WHERE application_id = {column} AND skill = ?)'
+    return ' AND '.join([exists] * len(skills)), tuple(skills)
+
+
+def matched_skills(conn, app_ids):
+    """``{application_id: [matched skills]}`` for a page of applications."""
+    skills = {app_id: [] for app_id in app_ids}
+    if not app_ids:
+        return skills
+    rows = conn.execute(f'''
+        SELECT application_id, skill FROM application_skills
+        WHERE application_id IN ({','.join('?' * len(app_ids))}) AND matched
+        ORDER BY application_id, category, skill
+    ''', tuple(app_ids)).fetchall()
+    for app_id, skill in rows:
+        skills[app_id].append(skill)
+    return skills
+
+
+def job_skill_coverage(conn, job_id):
+    """For each skill the job requires: (skill, category, applicants who have it)."""
+    return conn.execute('''
+        SELECT js.skill, js.category, COUNT(s.application_id) AS candidates
+        FROM job_skills js
+        LEFT JOIN (
+            SELECT s.skill, s.application_id FROM applications a
+            JOIN application_skills s ON s.application_id = a.id
+            WHERE a.job_id = ?
+        ) s ON s.skill = js.skill
+        WHERE js.job_id = ?
+        GROUP BY js.skill, js.category
+        ORDER BY candidates DESC, js.skill
+        LIMIT ?
+    ''', (job_id, job_id, SKILL_COVERAGE_LIMIT)).fetchall()
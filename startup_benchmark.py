@@ -0,0 +1,184 @@
+"""
+Start-up time and memory per web worker.
+
+    python startup_benchmark.py                         # cold start and worker memory
+    python startup_benchmark.py --workers 4 --save startup.json
+
+Cold start imports wsgi (the app plus its start-up step) in fresh
+interpreters, first against a new database, so the migrations run, then
+against the existing one. It also reports whether the PDF, DOCX and report
+libraries stayed unloaded, as they should until first use.
+
+Worker memory starts gunicorn (gunicorn.conf.py) with and without preload,
+sends some requests so every worker has served traffic, and reads the RSS,
+PSS and private memory of the master and each worker from
+/proc/<pid>/smaps_rollup. PSS splits shared pages between the processes
+mapping them, so its total is what the server really costs. Linux only.
+Everything runs in a temporary directory, never against ./database.db.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LAZY_MODULES = ('PyPDF2', 'docx', 'reportlab')
+
+COLD_START = f'''
+import json, sys, time
+start = time.perf_counter()
+import wsgi
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'loaded': [name for name in {LAZY_MODULES!r} if name in sys.modules]}}))
+'''
+
+
+def _env(**extra):
+    env = dict(os.environ, PYTHONPATH=ROOT, **extra)
+    env.pop('DATABASE', None)
+    return env
+
+
+# ------------------ COLD START ------------------ #
+def cold_start(runs):
+    with tempfile.TemporaryDirectory() as workdir:
+        samples, loaded = [], set()
+        for _ in range(runs + 1):
+            out = subprocess.run([sys.executable, '-c', COLD_START], cwd=workdir, env=_env(),
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            samples.append(result['seconds'])
+            loaded.update(result['loaded'])
+    # The first run created the database; the rest find it current.
+    return {
+        'first_start_s': round(samples[0], 3),
+        'start_median_s': round(statistics.median(samples[1:]), 3),
+        'start_max_s': round(max(samples[1:]), 3),
+        'heavy_modules_loaded': sorted(loaded),
+    }
+
+
+# ------------------ WORKER MEMORY ------------------ #
+def memory_kb(pid):
+    """RSS, PSS and private (USS) memory of one process, in kB."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def serve(workers, preload, requests_per_worker=20, timeout=60):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+             '--workers', str(workers), '--bind', f'127.0.0.1:{port}', 'wsgi:app'],
+            cwd=workdir, env=_env(GUNICORN_PRELOAD='1' if preload else '0'),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                try:
+                    get(base + '/jobs')
+                    break
+                except OSError:
+                    if time.perf_counter() - started > timeout or server.poll() is not None:
+                        raise RuntimeError("gunicorn did not come up")
+                    time.sleep(0.05)
+            ready = time.perf_counter() - started
+            while len(children(server.pid)) < workers:
+                time.sleep(0.05)
+
+            for _ in range(requests_per_worker * workers):
+                get(base + '/jobs')
+                get(base + '/')
+            time.sleep(0.5)
+
+            per_worker = [memory_kb(pid) for pid in children(server.pid)]
+            master = memory_kb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    def mean_mb(key):
+        return round(statistics.mean(w[key] for w in per_worker) / 1024, 1)
+
+    return {
+        'preload': preload,
+        'workers': workers,
+        'ready_s': round(ready, 3),
+        'worker_rss_mb': mean_mb('rss'),
+        'worker_pss_mb': mean_mb('pss'),
+        'worker_uss_mb': mean_mb('uss'),
+        'master_rss_mb': round(master['rss'] / 1024, 1),
+        'total_pss_mb': round((master['pss'] + sum(w['pss'] for w in per_worker)) / 1024, 1),
+    }
+
+
+def print_report(report):
+    cold = report['cold_start']
+    print(f"cold start: first {cold['first_start_s']} s (with migrations), then median "
+          f"{cold['start_median_s']} s, max {cold['start_max_s']} s")
+    print(f"heavy modules loaded at start-up: {', '.join(cold['heavy_modules_loaded']) or 'none'}")
+    if report.get('servers'):
+        print(f"\n{'preload':<9}{'workers':>8}{'ready s':>9}{'RSS MB':>9}{'PSS MB':>9}{'USS MB':>9}"
+              f"{'master RSS':>12}{'total PSS':>11}")
+        for row in report['servers']:
+            print(f"{str(row['preload']):<9}{row['workers']:>8}{row['ready_s']:>9}{row['worker_rss_mb']:>9}"
+                  f"{row['worker_pss_mb']:>9}{row['worker_uss_mb']:>9}{row['master_rss_mb']:>12}"
+                  f"{row['total_pss_mb']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure start-up time and memory per gunicorn worker")
+    parser.add_argument('--runs', type=int, default=5, help="cold starts to time against an existing database")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--no-server', action='store_true', help="only measure the cold start")
+    parser.add_argument('--save', metavar='FILE', help="write the results as JSON")
+    args = parser.parse_args()
+
+    report = {'cold_start': cold_start(args.runs), 'servers': []}
+    if not args.no_server:
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            sys.exit("Worker memory needs Linux's /proc/<pid>/smaps_rollup; use --no-server.")
+        report['servers'] = [serve(args.workers, preload=False), serve(args.workers, preload=True)]
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Content-addressed resume storage.
+
+Uploads are named by the SHA-256 of their contents and spread over two levels
+of shard directories (``resumes/ab/cd/<digest>.pdf``), so the same CV sent to
+twenty jobs is stored once, parses to one feature-cache entry, and no
+directory grows past a few thousand files. ``resume_blobs`` has one row per
+stored file; triggers on ``applications`` keep its reference count in step,
+and ``collect_garbage`` removes files nothing refers to any more.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+CHUNK_SIZE = 1 << 16
+# Unreferenced files younger than this are kept: their application may still
+# be on its way into the database.
+GC_GRACE_SECONDS = 3600
+GC_BATCH_SIZE = 500
+
+
+def create_resume_storage(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resume_blobs (
+            path TEXT PRIMARY KEY,
+            digest TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            last_used_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_resume_blobs_unused ON resume_blobs (refcount, last_used_at)')
+    cursor.execute('ALTER TABLE applications ADD COLUMN resume_name TEXT')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS applications_resume_insert AFTER INSERT ON applications
+        BEGIN
+            UPDATE resume_blobs SET refcount = refcount + 1 WHERE path = NEW.resume_path;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS applications_resume_delete AFTER DELETE ON applications
+        BEGIN
+            UPDATE resume_blobs SET refcount = refcount - 1 WHERE path = OLD.resume_path;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS applications_resume_update AFTER UPDATE OF resume_path ON applications
+        WHEN OLD.resume_path IS NOT NEW.resume_path
+        BEGIN
+            UPDATE resume_blobs SET refcount = refcount - 1 WHERE path = OLD.resume_path;
+            UPDATE resume_blobs SET refcount = refcount + 1 WHERE path = NEW.resume_path;
+        END
+    ''')
+
+
+class ResumeStore:
+    def __init__(self, root):
+        self.root = root
+
+    def path_for(self, digest, suffix):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + suffix)
+
+    def stage(self, stream, suffix):
+        """Copy ``stream`` into a temporary file; returns ``(digest, path, size, tmp_path)``.
+
+        The upload is hashed while it is written. ``place`` then moves it to
+        ``path``, once the blob row is registered.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        sha = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            self.discard(tmp_path)
+            raise
+        digest = sha.hexdigest()
+        return digest, self.path_for(digest, suffix), size, tmp_path
+
+    def place(self, tmp_path, path):
+        """Rename a staged file into place, or drop it if that content is already stored."""
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+    def discard(self, tmp_path):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def register_resume(conn, digest, path, size):
+    """Track a stored file; applications referencing ``path`` count towards it."""
+    conn.execute('''
+        INSERT INTO resume_blobs (path, digest, size, last_used_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET last_used_at = excluded.last_used_at
+    ''', (path, digest, size, time.time()))
+
+
+def store_resume(conn, store, file):
+    """Save an uploaded file and register it; returns the stored path."""
+    suffix = '.' + file.filename.rsplit('.', 1)[1].lower()
+    digest, path, size, tmp_path = store.stage(file.stream, suffix)
+    try:
+        # Registering takes the write lock and refreshes last_used_at, so
+        # collect_garbage can neither be unlinking this file while we look
+        # for it nor remove it afterwards.
+        register_resume(conn, digest, path, size)
+        store.place(tmp_path, path)
+        # Commit now so an application insert that fails later leaves a
+        # collectable row rather than an untracked file.
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        store.discard(tmp_path)
+        raise
+    return path
+
+def collect_garbage(conn, grace_seconds=GC_GRACE_SECONDS, batch_size=GC_BATCH_SIZE):
+    """Delete stored files no application refers to; returns how many went.
+
+    Each file is unlinked inside the transaction that deletes its row, after
+    the row is checked to be unused again, so an upload of the same content
+    (which registers the row first) either finds the file gone and stores it
+    afresh or keeps it from being collected. Batches keep the write lock
+    short.
+    """
+    removed = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cutoff = time.time() - grace_seconds
+            rows = conn.execute('SELECT path FROM resume_blobs WHERE refcount <= 0 AND last_used_at < ? LIMIT ?',
+                                (cutoff, batch_size)).fetchall()
+            for (path,) in rows:
+                if conn.execute('DELETE FROM resume_blobs WHERE path = ? AND refcount <= 0 AND last_used_at < ?',
+                                (path, cutoff)).rowcount:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    removed += 1
+            conn.commit()
+        except Exception:
+            # Rows of files already unlinked come back and are collected by
+            # the next run; an upload meanwhile finds the file gone and
+            # stores it again.
+            conn.rollback()
+            raise
+        if len(rows) < batch_size:
+            return removed
@@ -0,0 +1,435 @@
+"""
+SQLite-backed task queue for bulk AI shortlisting.
+
+A task snapshots the pending applications of a job into
+``shortlist_task_items``; a worker (see worker.py) claims the task and screens
+the items chunk by chunk. Every chunk commits the application updates, the
+item states and the task counters together, so a worker that dies mid-task
+leaves a consistent queue that the next worker resumes once the lease expires.
+While a task runs, a background thread renews its lease, however long a chunk
+takes; every write the worker makes is conditional on still owning the task,
+and it stops as soon as it does not.
+
+New applications can be screened the same way: with APPLY_SCREENING set to
+'queue', apply_job stores the application as 'screening' and adds it to
+``screening_queue``, and the worker fills in the score moments later.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from corpus import load_job_stats
+from database import connect
+from matching import get_job_profile
+from ml.parallel import screen_resumes
+from search import index_resume
+from skills import store_application_skills
+
+SHORTLIST_THRESHOLD = 60
+LEASE_SECONDS = 120
+HEARTBEAT_SECONDS = LEASE_SECONDS / 4
+SCREENING_BATCH_SIZE = 20
+MAX_SCREENING_ATTEMPTS = 3
+
+
+def create_task_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS shortlist_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            requested_by INTEGER,
+            status TEXT NOT NULL DEFAULT 'queued',
+            total INTEGER NOT NULL DEFAULT 0,
+            processed INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            heartbeat_at REAL,
+            finished_at REAL,
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS shortlist_task_items (
+            task_id INTEGER NOT NULL,
+            application_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            error TEXT,
+            PRIMARY KEY (task_id, application_id),
+            FOREIGN KEY (task_id) REFERENCES shortlist_tasks (id),
+            FOREIGN KEY (application_id) REFERENCES applications (id)
+        )
+    ''')
+
+
+def create_screening_queue(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS screening_queue (
+            application_id INTEGER PRIMARY KEY,
+            enqueued_at REAL NOT NULL,
+            claimed_by TEXT,
+            claimed_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (application_id) REFERENCES applications (id)
+        )
+    ''')
+
+
+def shortlist_status(result):
+    return 'shortlisted' if result['match_score'] >= SHORTLIST_THRESHOLD else 'rejected'
+
+
+# ==================== QUEUE ====================
+
+def enqueue_shortlist(conn, job_id, requested_by=None):
+    """Queue every pending application of ``job_id``; returns the task id.
+
+    An unfinished task for the same job is reused instead of queueing the
+    same applications twice.
+    """
+    existing = conn.execute(
+        "SELECT id FROM shortlist_tasks WHERE job_id = ? AND status IN ('queued', 'running')",
+        (job_id,)
+    ).fetchone()
+    if existing:
+        return existing[0]
+
+    cursor = conn.execute(
+        'INSERT INTO shortlist_tasks (job_id, requested_by, created_at) VALUES (?, ?, ?)',
+        (job_id, requested_by, time.time())
+    )
+    task_id = cursor.lastrowid
+    total = conn.execute('''
+        INSERT INTO shortlist_task_items (task_id, application_id)
+        SELECT ?, id FROM applications WHERE job_id = ? AND status = 'pending'
+    ''', (task_id, job_id)).rowcount
+    if total:
+        conn.execute('UPDATE shortlist_tasks SET total = ? WHERE id = ?', (total, task_id))
+    else:
+        conn.execute("UPDATE shortlist_tasks SET status = 'done', finished_at = ? WHERE id = ?",
+                     (time.time(), task_id))
+    conn.commit()
+    return task_id
+
+
+def task_progress(conn, task_id):
+    task = conn.execute('SELECT * FROM shortlist_tasks WHERE id = ?', (task_id,)).fetchone()
+    if task is None:
+        return None
+
+    done = task['processed'] + task['failed']
+    eta = None
+    if task['status'] == 'running' and task['started_at'] and done:
+        elapsed = time.time() - task['started_at']
+        eta = round(elapsed / done * (task['total'] - done), 1)
+    elif task['status'] == 'done':
+        eta = 0
+
+    failures = [dict(row) for row in conn.execute('''
+        SELECT application_id, error FROM shortlist_task_items
+        WHERE task_id = ? AND status = 'failed' LIMIT 50
+    ''', (task_id,))]
+
+    return {
+        'task_id': task['id'],
+        'job_id': task['job_id'],
+        'status': task['status'],
+        'total': task['total'],
+        'processed': task['processed'],
+        'failed': task['failed'],
+        'remaining': task['total'] - done,
+        'eta_seconds': eta,
+        'error': task['error'],
+        'failures': failures,
+    }
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim_task(conn, worker=None, lease_seconds=LEASE_SECONDS, task_id=None):
+    """Atomically take the oldest queued task, or one whose worker went quiet.
+
+    ``task_id`` claims that task only, e.g. to run it inline. Returns the
+    claimed task's id, or None.
+    """
+    worker = worker or worker_name()
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('''
+            SELECT id FROM shortlist_tasks
+            WHERE (status = 'queued' OR (status = 'running' AND heartbeat_at < ?)) AND (? IS NULL OR id = ?)
+            ORDER BY id LIMIT 1
+        ''', (now - lease_seconds, task_id, task_id)).fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        conn.execute('''
+            UPDATE shortlist_tasks
+            SET status = 'running', worker = ?, heartbeat_at = ?, started_at = COALESCE(started_at, ?)
+            WHERE id = ?
+        ''', (worker, now, now, row[0]))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return row[0]
+
+
+# Held by heartbeat threads while they are inside SQLite and taken around
+# every fork, so a child (a parsing pool process) never inherits SQLite's
+# locks mid-statement and hangs on its first query.
+_heartbeat_lock = threading.Lock()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_heartbeat_lock.acquire, after_in_parent=_heartbeat_lock.release,
+                        after_in_child=_heartbeat_lock.release)
+
+
+class TaskLease:
+    """Renews a claimed task's heartbeat from a background thread.
+
+    The thread has its own connection, so the lease stays fresh while the
+    worker is busy parsing a slow chunk. ``lost`` turns true once the task
+    is no longer running under this worker (another worker reclaimed it).
+    """
+
+    def __init__(self, conn, task_id, worker, interval=HEARTBEAT_SECONDS):
+        self.path = conn.execute('PRAGMA database_list').fetchone()[2]
+        self.task_id = task_id
+        self.worker = worker
+        self.interval = interval
+        self._stop = threading.Event()
+        self._lost = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def lost(self):
+        return self._lost.is_set()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        with _heartbeat_lock:
+            conn = connect(self.path)
+        try:
+            while not self._stop.wait(self.interval):
+                with _heartbeat_lock:
+                    try:
+                        owned = conn.execute('''
+                            UPDATE shortlist_tasks SET heartbeat_at = ?
+                            WHERE id = ? AND worker = ? AND status = 'running'
+                        ''', (time.time(), self.task_id, self.worker)).rowcount
+                        conn.commit()
+                    except sqlite3.Error:
+                        # Busy or locked: try again next interval, well within the lease.
+                        conn.rollback()
+                        continue
+                if not owned:
+                    self._lost.set()
+                    return
+        finally:
+            with _heartbeat_lock:
+                conn.close()
+
+
+# ==================== EXECUTION ====================
+
+def run_task(conn, task_id, screener, worker, max_workers=1, chunk_size=25):
+    """Screen the outstanding items of a task claimed by ``worker``, committing once per chunk.
+
+    Returns False if the task was lost to another worker part-way; the
+    chunk in progress is then discarded.
+    """
+    job = conn.execute('''
+        SELECT j.id, j.title, j.requirements FROM shortlist_tasks t
+        JOIN jobs j ON t.job_id = j.id WHERE t.id = ?
+    ''', (task_id,)).fetchone()
+    if job is None:
+        conn.execute('''
+            UPDATE shortlist_tasks SET status = 'failed', error = ?, finished_at = ?
+            WHERE id = ? AND worker = ?
+        ''', ('Job not found', time.time(), task_id, worker))
+        conn.commit()
+        return True
+
+    items = conn.execute('''
+        SELECT a.id, a.resume_path FROM shortlist_task_items i
+        JOIN applications a ON i.application_id = a.id
+        WHERE i.task_id = ? AND i.status = 'queued'
+        ORDER BY a.id
+    ''', (task_id,)).fetchall()
+
+    profile = get_job_profile(conn, screener, job)
+    stats = load_job_stats(conn, job['id'])
+    # Keep a freshly built profile; chunks run in their own transactions.
+    conn.commit()
+    chunks = screen_resumes(screener, [(a['id'], a['resume_path']) for a in items], profile, stats=stats,
+                            max_workers=max_workers, chunk_size=chunk_size)
+    # Closing the chunks on the way out stops the pool's queued parsing.
+    with TaskLease(conn, task_id, worker) as lease, closing(chunks):
+        for chunk in chunks:
+            if lease.lost or not _save_chunk(conn, task_id, worker, chunk):
+                return False
+
+    owned = conn.execute('''
+        UPDATE shortlist_tasks SET status = 'done', finished_at = ?
+        WHERE id = ? AND worker = ? AND status = 'running'
+    ''', (time.time(), task_id, worker)).rowcount
+    conn.commit()
+    return bool(owned)
+
+
+def _save_chunk(conn, task_id, worker, chunk):
+    # One transaction per chunk, opened by the ownership check so no other
+    # worker can take the task over between the check and the commit.
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        owned = conn.execute('''
+            SELECT 1 FROM shortlist_tasks WHERE id = ? AND worker = ? AND status = 'running'
+        ''', (task_id, worker)).fetchone()
+        if owned is None:
+            conn.rollback()
+            return False
+
+        processed = failed = 0
+        for app_id, result in chunk:
+            # Only items still queued count, so a chunk is never counted twice.
+            if result.get('error'):
+                failed += conn.execute('''
+                    UPDATE shortlist_task_items SET status = 'failed', error = ?
+                    WHERE task_id = ? AND application_id = ? AND status = 'queued'
+                ''', (result['error'], task_id, app_id)).rowcount
+                continue
+            if not conn.execute('''
+                UPDATE shortlist_task_items SET status = 'done'
+                WHERE task_id = ? AND application_id = ? AND status = 'queued'
+            ''', (task_id, app_id)).rowcount:
+                continue
+            processed += 1
+            # Leave applications a recruiter already moved out of 'pending' alone.
+            conn.execute('''
+                UPDATE applications SET status = ?, match_score = ?, screening_result = ?,
+                                        scoring_version = ?, profile_fingerprint = ?
+                WHERE id = ? AND status = 'pending'
+            ''', (shortlist_status(result), result['match_score'], json.dumps(result),
+                  result['scoring_version'], result['profile_fingerprint'], app_id))
+            store_application_skills(conn, app_id, result)
+
+        conn.execute('''
+            UPDATE shortlist_tasks SET processed = processed + ?, failed = failed + ?, heartbeat_at = ?
+            WHERE id = ?
+        ''', (processed, failed, time.time(), task_id))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return True
+
+
+# ==================== APPLICATION SCREENING ====================
+
+def score_application(conn, screener, job, resume_path):
+    """Screen one resume against ``job``'s current corpus statistics.
+
+    The statistics are left as they are, so every applicant until the next
+    re-rank is measured against the same ones (see rescoring.py). Returns
+    the result together with the extracted features (None if no text could
+    be extracted), which store_screening indexes for candidate search.
+    """
+    features = screener.extract_features(resume_path)
+    profile = get_job_profile(conn, screener, job)
+    stats = load_job_stats(conn, job['id'])
+    return screener.screen_features(features, profile, stats=stats), features
+
+
+def store_screening(conn, app_id, result, features=None):
+    """Record a screening result; an application still 'screening' becomes 'pending'."""
+    if features:
+        index_resume(conn, app_id, features)
+    store_application_skills(conn, app_id, result)
+    conn.execute('''
+        UPDATE applications
+        SET match_score = ?, skills_matched = ?, experience_years = ?, education_level = ?,
+            screening_result = ?, scoring_version = ?, profile_fingerprint = ?,
+            status = CASE WHEN status = 'screening' THEN 'pending' ELSE status END
+        WHERE id = ?
+    ''', (result['match_score'], json.dumps(result.get('skills_matched', [])),
+          result.get('experience_years', 0), result.get('education_level', 'Unknown'),
+          json.dumps(result), result.get('scoring_version'), result.get('profile_fingerprint'), app_id))
+
+
+def enqueue_screening(conn, app_id):
+    """Queue a freshly inserted application for scoring. The caller commits."""
+    conn.execute('INSERT OR IGNORE INTO screening_queue (application_id, enqueued_at) VALUES (?, ?)',
+                 (app_id, time.time()))
+
+
+def claim_screening(conn, worker=None, limit=SCREENING_BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+    """Take up to ``limit`` unclaimed (or abandoned) queued applications."""
+    worker = worker or worker_name()
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        rows = conn.execute('''
+            SELECT application_id FROM screening_queue
+            WHERE claimed_at IS NULL OR claimed_at < ?
+            ORDER BY application_id LIMIT ?
+        ''', (now - lease_seconds, limit)).fetchall()
+        conn.executemany('''
+            UPDATE screening_queue SET claimed_by = ?, claimed_at = ?, attempts = attempts + 1
+            WHERE application_id = ?
+        ''', [(worker, now, row[0]) for row in rows])
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return [row[0] for row in rows]
+
+
+def screen_queued_applications(conn, screener, worker=None):
+    """Score one claimed batch of new applications; returns how many were handled.
+
+    Each application commits on its own so its score shows up as soon as it
+    is ready. One that keeps failing (or killing its worker) is given up on
+    after MAX_SCREENING_ATTEMPTS and left 'pending' with the error recorded.
+    """
+    app_ids = claim_screening(conn, worker)
+    for app_id in app_ids:
+        row = conn.execute('''
+            SELECT a.resume_path, q.attempts, j.id, j.title, j.requirements
+            FROM screening_queue q
+            JOIN applications a ON q.application_id = a.id
+            JOIN jobs j ON a.job_id = j.id
+            WHERE q.application_id = ?
+        ''', (app_id,)).fetchone()
+        try:
+            if row is None:
+                pass
+            elif row['attempts'] > MAX_SCREENING_ATTEMPTS:
+                store_screening(conn, app_id, {'error': 'Screening failed repeatedly', 'match_score': 0})
+            else:
+                job = {'id': row['id'], 'title': row['title'], 'requirements': row['requirements']}
+                store_screening(conn, app_id, *score_application(conn, screener, job, row['resume_path']))
+            conn.execute('DELETE FROM screening_queue WHERE application_id = ?', (app_id,))
+            conn.commit()
+        except Exception as e:
+            # Leave the claim in place; the item is retried once its lease expires.
+            conn.rollback()
+            print(f"Error screening application {app_id}: {e}")
+    return len(app_ids)
@@ -0,0 +1,14 @@
+from pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor([71.5, '2024-01-01 10:00:00', 3]), 3) == (71.5, '2024-01-01 10:00:00', 3)
+
+
+def test_malformed_cursors_are_rejected():
+    assert decode_cursor('W1tdLDEsMl0', 3) is None  # [[],1,2]
+    assert decode_cursor(encode_cursor([{}, 1, 2]), 3) is None
+    assert decode_cursor(encode_cursor([None, 1, 2]), 3) is None
+    assert decode_cursor(encode_cursor([True, 1, 2]), 3) is None
+    assert decode_cursor(encode_cursor([1, 2]), 3) is None
+    assert decode_cursor('not base64!', 3) is None
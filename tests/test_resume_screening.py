@@ -0,0 +1,35 @@
+import pytest
+
+from ml.resume_screening import ResumeScreener
+
+
+@pytest.fixture(scope='module')
+def screener():
+    return ResumeScreener()
+
+
+def test_study_period_is_not_experience(screener):
+    assert screener.extract_experience('Education: B.Sc, State University, 2014 - 2018') == 0
+
+
+def test_ranges_under_education_heading_are_skipped(screener):
+    text = ('EDUCATION\nState University\nComputer Science, 2014 - 2018\n\n'
+            'EXPERIENCE\nAcme Corp, Developer, 2018 - 2022')
+    assert screener.extract_experience(text) == 4
+
+
+def test_employment_ranges_still_count(screener):
+    assert screener.extract_experience('Work Experience\nAcme Corp, Developer, 2016 - 2022') == 6
+
+
+@pytest.mark.parametrize('text, skill, found', [
+    ('Led R&D at AT&T', 'r', False),
+    ('Statistics in R/Python', 'r', True),
+    ('Python/Django, R and SQL', 'django', True),
+    ('CI/CD with Jenkins', 'ci/cd', True),
+    ('The go-to person for support', 'go', False),
+    ('Services written in Go, C++ and C#', 'go', True),
+])
+def test_skill_boundaries(screener, text, skill, found):
+    skills, _ = screener.extract_skills(text)
+    assert (skill in skills) == found
@@ -0,0 +1,99 @@
+"""
+Background worker for AI screening.
+
+Run alongside the web app:  python worker.py
+(with BACKGROUND_WORKER=0 set for the web app). By default each web process
+runs the same loop on a background thread instead, so a deployment with only
+a web service (render.yaml) still drains its queues.
+New applications queued by apply_job are scored first, then tasks queued by
+/recruiter/jobs/<job_id>/ai-shortlist-all are claimed from the database and
+screened here; work left behind by a crashed worker is picked up again once
+its lease expires. Jobs whose requirements were edited, and on start-up every
+job scored by an older scoring version or grown well past its corpus
+statistics, are re-scored when nothing else is waiting.
+"""
+
+import argparse
+import threading
+import time
+import traceback
+
+import app as web
+from database import connect
+from rescoring import enqueue_rescore, rerank_outgrown_jobs, rescore_queued_jobs, stale_jobs
+from tasks import claim_task, run_task, screen_queued_applications, worker_name, LEASE_SECONDS
+
+
+def work(once=False, poll_interval=2.0, max_workers=None):
+    web.startup()
+    screener = web.screener
+    worker = worker_name()
+    conn = connect()
+    try:
+        # Pick up a new skills taxonomy or scorer as soon as it is deployed.
+        for job_id in stale_jobs(conn, screener):
+            enqueue_rescore(conn, job_id)
+        rerank_outgrown_jobs(conn)
+        conn.commit()
+
+        while True:
+            # New applications first: a job seeker is waiting on each of them.
+            screened = screen_queued_applications(conn, screener, worker)
+            if screened:
+                # Newly scored applications may have outgrown their job's
+                # corpus statistics; re-rank those jobs when idle.
+                rerank_outgrown_jobs(conn)
+                conn.commit()
+
+            task_id = claim_task(conn, worker, lease_seconds=LEASE_SECONDS)
+            if task_id is not None:
+                print(f"Screening task {task_id}")
+                try:
+                    if not run_task(conn, task_id, screener, worker,
+                                    max_workers=max_workers or web.app.config['SCREENING_WORKERS'],
+                                    chunk_size=web.app.config['SCREENING_CHUNK_SIZE']):
+                        print(f"Task {task_id} was taken over by another worker")
+                except Exception as e:
+                    traceback.print_exc()
+                    conn.rollback()
+                    conn.execute('''
+                        UPDATE shortlist_tasks SET status = 'failed', error = ?, finished_at = ?
+                        WHERE id = ? AND worker = ?
+                    ''', (str(e), time.time(), task_id, worker))
+                    conn.commit()
+
+            rescored = 0
+            if task_id is None and not screened:
+                rescored = rescore_queued_jobs(conn, screener)
+
+            if once:
+                return
+            if task_id is None and not screened and not rescored:
+                time.sleep(poll_interval)
+    finally:
+        conn.close()
+
+
+def start_in_background(poll_interval=2.0):
+    """Run work() on a daemon thread of the current process; returns the thread."""
+    def run():
+        while True:
+            try:
+                # Parse in this thread: forking a pool from a process whose
+                # request threads may be inside SQLite can deadlock the children.
+                work(poll_interval=poll_interval, max_workers=1)
+            except Exception:
+                traceback.print_exc()
+                time.sleep(poll_interval)
+
+    thread = threading.Thread(target=run, name='screening-worker', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process queued application screening, AI shortlist and re-scoring tasks")
+    parser.add_argument('--once', action='store_true', help="process one round of queued work and exit")
+    parser.add_argument('--poll-interval', type=float, default=2.0, help="seconds to wait when the queue is empty")
+    args = parser.parse_args()
+    work(once=args.once, poll_interval=args.poll_interval)
@@ -0,0 +1,14 @@
+"""
+WSGI entry point for production:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module builds the app and runs its start-up step (screener,
+upload folder, schema migrations). With gunicorn.conf.py's preload_app that happens
+once, in the master, and every worker forks from a process that already has
+the screener's skill matcher and taxonomy tables built.
+"""
+
+from app import app, startup
+
+startup()